@@ -2,38 +2,138 @@
 
 from __future__ import annotations
 
+import voluptuous as vol
+
+from homeassistant.config_entries import ConfigEntryState
 from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.typing import ConfigType
+from homeassistant.util import dt as dt_util
 
 from .const import (
-    CONF_WEATHER_ENABLED
+    ATTR_CONFIG_ENTRY_ID,
+    ATTR_PRICES,
+    CONF_FLEET,
+    CONF_WEATHER_ENABLED,
+    DATA_FLEET,
+    DOMAIN,
+    SERVICE_GET_TARIFF_PLAN,
+    STORAGE_VERSION,
 )
 
 from .coordinator import PVNodeConfigEntry, PVNodeDataUpdateCoordinator
+from .fleet import PVNodeFleetCoordinator
+from .tariff import parse_prices
 
 PLATFORMS = [Platform.SENSOR]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+SERVICE_GET_TARIFF_PLAN_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_PRICES): [dict],
+    }
+)
+
+def _platforms(entry: PVNodeConfigEntry) -> list[Platform]:
+    """Return the platforms of a config entry."""
+    if entry.data.get(CONF_WEATHER_ENABLED):
+        return [*PLATFORMS, Platform.WEATHER]
+    return PLATFORMS
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the PVNode services."""
+
+    async def async_get_tariff_plan(call: ServiceCall) -> ServiceResponse:
+        """Return the tariff plan of a site."""
+        entry = hass.config_entries.async_get_entry(call.data[ATTR_CONFIG_ENTRY_ID])
+        if entry is None or entry.domain != DOMAIN or entry.data.get(CONF_FLEET):
+            raise ServiceValidationError(f"{call.data[ATTR_CONFIG_ENTRY_ID]} is not a PVNode site")
+        if entry.state is not ConfigEntryState.LOADED or entry.runtime_data.data is None:
+            raise ServiceValidationError(f"{entry.title} has no forecast yet")
+
+        coordinator = entry.runtime_data
+        prices = None
+        if ATTR_PRICES in call.data:
+            prices = parse_prices(call.data[ATTR_PRICES], dt_util.get_default_time_zone())
+            if not prices:
+                raise ServiceValidationError("No valid prices, items need a start and a price")
+
+        estimate = coordinator.data
+        plan = coordinator.plan_tariff(estimate, estimate.now(), prices)
+        if plan is None:
+            raise ServiceValidationError(f"{entry.title} has no prices to plan against")
+        return plan.as_dict()
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_TARIFF_PLAN,
+        async_get_tariff_plan,
+        schema=SERVICE_GET_TARIFF_PLAN_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    return True
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: PVNodeConfigEntry) -> bool:
     """Set up PVNode from a config entry."""
+    if entry.data.get(CONF_FLEET):
+        return await _async_setup_fleet(hass, entry)
+
     coordinator = PVNodeDataUpdateCoordinator(hass, entry)
-    await coordinator.async_config_entry_first_refresh()
+    # serve the persisted forecast right away, fetching must not block startup
+    await coordinator.async_restore()
 
     entry.runtime_data = coordinator
 
-    platforms = PLATFORMS
-    if entry.data[CONF_WEATHER_ENABLED]:
-        platforms.append(Platform.WEATHER)
+    if (fleet := hass.data.get(DOMAIN, {}).get(DATA_FLEET)) is not None:
+        fleet.async_add_member(coordinator)
 
-    await hass.config_entries.async_forward_entry_setups(entry, platforms)
+    await hass.config_entries.async_forward_entry_setups(entry, _platforms(entry))
 
     entry.async_on_unload(entry.add_update_listener(async_update_options))
 
+    entry.async_create_background_task(
+        hass, coordinator.async_refresh(), f"{DOMAIN} first refresh {entry.entry_id}"
+    )
+
+    return True
+
+
+async def _async_setup_fleet(hass: HomeAssistant, entry: PVNodeConfigEntry) -> bool:
+    """Set up the aggregate of all sites."""
+    fleet = PVNodeFleetCoordinator(hass, entry)
+    fleet.async_add_members()
+
+    entry.runtime_data = fleet
+    hass.data.setdefault(DOMAIN, {})[DATA_FLEET] = fleet
+
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+
     return True
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: PVNodeConfigEntry) -> bool:
     """Unload a config entry."""
-    return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    unloaded = await hass.config_entries.async_unload_platforms(entry, _platforms(entry))
+    if unloaded and entry.data.get(CONF_FLEET):
+        entry.runtime_data.async_shutdown_members()
+        hass.data[DOMAIN].pop(DATA_FLEET, None)
+    elif unloaded and (fleet := hass.data.get(DOMAIN, {}).get(DATA_FLEET)) is not None:
+        # the fleet may have picked the site up on its own, see async_add_members
+        fleet.async_remove_member(entry.entry_id)
+    return unloaded
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: PVNodeConfigEntry) -> None:
+    """Remove the persisted state of a config entry."""
+    await Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}").async_remove()
 
 
 async def async_update_options(hass: HomeAssistant, entry: PVNodeConfigEntry) -> None:
@@ -0,0 +1,86 @@
+"""Battery state-of-charge projection over the PVNode forecast."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+
+@dataclass(frozen=True)
+class Battery:
+    """Simple battery model, energies in Wh and powers in W."""
+
+    capacity: float
+    charge_power: float
+    discharge_power: float
+    efficiency: float = 0.9
+
+
+@dataclass(frozen=True)
+class BatteryProjection:
+    """Projected battery state over the forecast horizon."""
+
+    soc: dict[datetime, float]
+    time_to_full: datetime | None
+    time_to_empty: datetime | None
+    grid_export: dict[datetime, float]
+    grid_import: dict[datetime, float]
+
+    def soc_at(self, at: datetime) -> float | None:
+        """Return the projected state of charge at the last full hour before at."""
+        value = None
+        for end, soc in self.soc.items():
+            if end > at:
+                break
+            value = soc
+        return value
+
+    def export_until(self, until: datetime) -> float:
+        """Return the projected energy sent to the grid until a point in time."""
+        return sum(wh for start, wh in self.grid_export.items() if start < until)
+
+
+def project_battery(battery: Battery, soc: float, now: datetime, wh_hours: dict[datetime, float], load: list[float]) -> BatteryProjection:
+    """Step the battery forward hour by hour, starting from soc (%) at now."""
+    # round trip efficiency, split evenly between charging and discharging
+    eff = battery.efficiency ** 0.5
+    energy = battery.capacity * min(max(soc, 0), 100) / 100
+
+    soc_series = {}
+    grid_export = {}
+    grid_import = {}
+    time_to_full = now if energy >= battery.capacity else None
+    time_to_empty = now if energy <= 0 else None
+
+    for start, pv in wh_hours.items():
+        end = start + timedelta(hours=1)
+        if end <= now:
+            continue
+
+        # only the remaining part of the current hour counts
+        begin = max(start, now)
+        fraction = (end - begin) / timedelta(hours=1)
+        net = (pv - load[start.hour]) * fraction
+
+        exported = imported = 0
+        # interpolate within the hour on the rate the battery could take or give
+        if net > 0:
+            rate = min(net * eff, battery.charge_power * fraction)
+            stored = min(rate, battery.capacity - energy)
+            if time_to_full is None and rate > 0 and energy + rate >= battery.capacity:
+                time_to_full = begin + (end - begin) * ((battery.capacity - energy) / rate)
+            energy += stored
+            exported = net - stored / eff
+        elif net < 0:
+            rate = min(-net / eff, battery.discharge_power * fraction)
+            drawn = min(rate, energy)
+            if time_to_empty is None and rate > 0 and energy - rate <= 0:
+                time_to_empty = begin + (end - begin) * (energy / rate)
+            energy -= drawn
+            imported = -net - drawn * eff
+
+        soc_series[end] = 100 * energy / battery.capacity
+        grid_export[start] = exported
+        grid_import[start] = imported
+
+    return BatteryProjection(soc_series, time_to_full, time_to_empty, grid_export, grid_import)
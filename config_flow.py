@@ -16,9 +16,11 @@ from homeassistant.config_entries import (
     OptionsFlow,
 )
 from homeassistant.const import CONF_API_KEY, CONF_LATITUDE, CONF_LONGITUDE, CONF_NAME
-from homeassistant.core import callback
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers import config_validation as cv, selector
 
+from .coordinator import create_pvnode
+from .pvnode import PVNodeAuthError, PVNodeConnectionError, PVNodeParameterError, load_profile
 from .const import (
     CONF_ORIENTATION,
     CONF_SLOPE,
@@ -28,12 +30,45 @@ from .const import (
     CONF_TECHNOLOGY,
     CONF_OBSTRUCTION,
     CONF_WEATHER_ENABLED,
+    CONF_PRODUCTION_ENTITY,
+    CONF_BASE_LOAD,
+    CONF_BATTERY_SOC_ENTITY,
+    CONF_BATTERY_CAPACITY,
+    CONF_BATTERY_CHARGE_POWER,
+    CONF_BATTERY_DISCHARGE_POWER,
+    CONF_BATTERY_EFFICIENCY,
+    CONF_EXPORT_LIMIT,
+    CONF_CHANGE_THRESHOLD_ENERGY,
+    CONF_CHANGE_THRESHOLD_PEAK,
+    CONF_PRICE_ENTITY,
+    CONF_PRICE_WINDOW,
+    CONF_FLEET,
+    DATA_SEED,
     TECHNOLOGIES,
     DOMAIN,
 )
 
 RE_API_KEY = re.compile(r"^pvn_[a-zA-Z0-9]{32}$")
 
+
+async def _async_test_fetch(hass: HomeAssistant, data: dict[str, Any], options: dict[str, Any], errors: dict[str, str], placeholders: dict[str, str]) -> None:
+    """Fetch a forecast with the given settings and keep it for the entry setup."""
+    forecast = create_pvnode(hass, data, options)
+    try:
+        estimate = await forecast.estimate()
+    except PVNodeAuthError as error:
+        errors[CONF_API_KEY] = "invalid_auth"
+        placeholders["detail"] = str(error)
+    except PVNodeParameterError as error:
+        errors["base"] = "invalid_parameters"
+        placeholders["detail"] = str(error)
+    except PVNodeConnectionError as error:
+        errors["base"] = "cannot_connect"
+        placeholders["detail"] = str(error)
+    else:
+        hass.data.setdefault(DOMAIN, {}).setdefault(DATA_SEED, {})[forecast.cache_key] = estimate
+
+
 class PVNodeFlowHandler(ConfigFlow, domain=DOMAIN):
     """Handle a config flow for PVNode."""
 
@@ -45,30 +80,55 @@ class PVNodeFlowHandler(ConfigFlow, domain=DOMAIN):
         """Get the options flow for this handler."""
         return PVNodeOptionFlowHandler()
 
+    @classmethod
+    @callback
+    def async_supports_options_flow(cls, config_entry: ConfigEntry) -> bool:
+        """The fleet has no options."""
+        return not config_entry.data.get(CONF_FLEET)
+
     async def async_step_user(self, user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
         """Handle a flow initiated by the user."""
+        entries = self._async_current_entries()
+        if not entries or any(entry.data.get(CONF_FLEET) for entry in entries):
+            return await self.async_step_site()
+
+        return self.async_show_menu(step_id="user", menu_options=["site", "fleet"])
+
+    async def async_step_fleet(self, user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
+        """Add the aggregate of all sites."""
+        await self.async_set_unique_id(CONF_FLEET)
+        self._abort_if_unique_id_configured()
+        return self.async_create_entry(title="PVNode fleet", data={CONF_FLEET: True})
+
+    async def async_step_site(self, user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
+        """Add a site."""
+        errors = {}
+        placeholders = {"detail": ""}
         if user_input is not None:
-            return self.async_create_entry(
-                title=user_input[CONF_NAME],
-                data={
-                    CONF_LATITUDE: user_input[CONF_LATITUDE],
-                    CONF_LONGITUDE: user_input[CONF_LONGITUDE],
-                    CONF_WEATHER_ENABLED: user_input[CONF_WEATHER_ENABLED],
-                },
-                options={
-                    CONF_ORIENTATION: user_input[CONF_ORIENTATION],
-                    CONF_SLOPE: user_input[CONF_SLOPE],
-                    CONF_KWP: user_input[CONF_KWP],
-                    CONF_API_KEY: user_input[CONF_API_KEY],
-                    CONF_INSTALLATION_DATE: user_input[CONF_INSTALLATION_DATE],
-                    CONF_INSTALLATION_HEIGHT: user_input[CONF_INSTALLATION_HEIGHT],
-                    CONF_TECHNOLOGY: user_input[CONF_TECHNOLOGY],
-                    CONF_OBSTRUCTION: user_input[CONF_OBSTRUCTION],
-                },
-            )
+            data = {
+                CONF_LATITUDE: user_input[CONF_LATITUDE],
+                CONF_LONGITUDE: user_input[CONF_LONGITUDE],
+                CONF_WEATHER_ENABLED: user_input[CONF_WEATHER_ENABLED],
+            }
+            options = {
+                CONF_ORIENTATION: user_input[CONF_ORIENTATION],
+                CONF_SLOPE: user_input[CONF_SLOPE],
+                CONF_KWP: user_input[CONF_KWP],
+                CONF_API_KEY: user_input[CONF_API_KEY],
+                CONF_INSTALLATION_DATE: user_input.get(CONF_INSTALLATION_DATE),
+                CONF_INSTALLATION_HEIGHT: user_input[CONF_INSTALLATION_HEIGHT],
+                CONF_TECHNOLOGY: user_input[CONF_TECHNOLOGY],
+                CONF_OBSTRUCTION: user_input[CONF_OBSTRUCTION],
+            }
+            if RE_API_KEY.match(user_input[CONF_API_KEY]) is None:
+                errors[CONF_API_KEY] = "invalid_api_key"
+            else:
+                await _async_test_fetch(self.hass, data, options, errors, placeholders)
+            if not errors:
+                return self.async_create_entry(title=user_input[CONF_NAME], data=data, options=options)
 
         return self.async_show_form(
-            step_id="user",
+            step_id="site",
             data_schema=vol.Schema(
                 {
                     vol.Required(
@@ -111,6 +171,8 @@ class PVNodeFlowHandler(ConfigFlow, domain=DOMAIN):
                     ),
                 }
             ),
+            errors=errors,
+            description_placeholders=placeholders,
         )
 
 
@@ -120,11 +182,26 @@ class PVNodeOptionFlowHandler(OptionsFlow):
     async def async_step_init(self, user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
         """Manage the options."""
         errors = {}
+        placeholders = {"detail": ""}
         if user_input is not None:
+            try:
+                load_profile(user_input.get(CONF_BASE_LOAD, ""))
+            except ValueError:
+                errors[CONF_BASE_LOAD] = "invalid_base_load"
             if (api_key := user_input.get(CONF_API_KEY)) and RE_API_KEY.match(api_key) is None:
                 errors[CONF_API_KEY] = "invalid_api_key"
-            else:
-                return self.async_create_entry(title="", data=user_input | {CONF_API_KEY: api_key or None})
+            elif not errors:
+                options = user_input | {CONF_API_KEY: api_key or None}
+                # only settings that change the fetched forecast are tested, the
+                # reload they cause picks up the seeded forecast
+                data = self.config_entry.data
+                if api_key and (
+                    create_pvnode(self.hass, data, options).cache_key
+                    != create_pvnode(self.hass, data, self.config_entry.options).cache_key
+                ):
+                    await _async_test_fetch(self.hass, data, options, errors, placeholders)
+                if not errors:
+                    return self.async_create_entry(title="", data=options)
 
         return self.async_show_form(
             step_id="init",
@@ -162,8 +239,70 @@ class PVNodeOptionFlowHandler(OptionsFlow):
                     vol.Optional(
                         CONF_OBSTRUCTION, default=self.config_entry.options[CONF_OBSTRUCTION]
                     ): str,
+                    vol.Optional(
+                        CONF_PRODUCTION_ENTITY,
+                        description={
+                            "suggested_value": self.config_entry.options.get(
+                                CONF_PRODUCTION_ENTITY
+                            )
+                        },
+                    ): selector.EntitySelector(
+                        selector.EntitySelectorConfig(
+                            domain="sensor", device_class="power"
+                        )
+                    ),
+                    vol.Optional(
+                        CONF_BASE_LOAD, default=self.config_entry.options.get(CONF_BASE_LOAD, "")
+                    ): str,
+                    vol.Optional(
+                        CONF_BATTERY_SOC_ENTITY,
+                        description={
+                            "suggested_value": self.config_entry.options.get(
+                                CONF_BATTERY_SOC_ENTITY
+                            )
+                        },
+                    ): selector.EntitySelector(
+                        selector.EntitySelectorConfig(
+                            domain="sensor", device_class="battery"
+                        )
+                    ),
+                    vol.Optional(
+                        CONF_BATTERY_CAPACITY, default=self.config_entry.options.get(CONF_BATTERY_CAPACITY, 0)
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                    vol.Optional(
+                        CONF_BATTERY_CHARGE_POWER, default=self.config_entry.options.get(CONF_BATTERY_CHARGE_POWER, 5000)
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                    vol.Optional(
+                        CONF_BATTERY_DISCHARGE_POWER, default=self.config_entry.options.get(CONF_BATTERY_DISCHARGE_POWER, 5000)
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                    vol.Optional(
+                        CONF_BATTERY_EFFICIENCY, default=self.config_entry.options.get(CONF_BATTERY_EFFICIENCY, 90)
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=100)),
+                    vol.Optional(
+                        CONF_EXPORT_LIMIT, default=self.config_entry.options.get(CONF_EXPORT_LIMIT, 100)
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=100)),
+                    vol.Optional(
+                        CONF_CHANGE_THRESHOLD_ENERGY, default=self.config_entry.options.get(CONF_CHANGE_THRESHOLD_ENERGY, 1.0)
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                    vol.Optional(
+                        CONF_CHANGE_THRESHOLD_PEAK, default=self.config_entry.options.get(CONF_CHANGE_THRESHOLD_PEAK, 60)
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                    vol.Optional(
+                        CONF_PRICE_ENTITY,
+                        description={
+                            "suggested_value": self.config_entry.options.get(
+                                CONF_PRICE_ENTITY
+                            )
+                        },
+                    ): selector.EntitySelector(
+                        selector.EntitySelectorConfig(domain="sensor")
+                    ),
+                    vol.Optional(
+                        CONF_PRICE_WINDOW, default=self.config_entry.options.get(CONF_PRICE_WINDOW, 3)
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=24)),
 
                 }
             ),
             errors=errors,
+            description_placeholders=placeholders,
         )
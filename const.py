@@ -34,6 +34,30 @@ CONF_INSTALLATION_DATE = "instdate"
 CONF_TECHNOLOGY = "technology"
 CONF_OBSTRUCTION = "obstruction"
 CONF_WEATHER_ENABLED = "weather_enabled"
+CONF_PRODUCTION_ENTITY = "production_entity"
+CONF_BASE_LOAD = "base_load"
+CONF_BATTERY_SOC_ENTITY = "battery_soc_entity"
+CONF_BATTERY_CAPACITY = "battery_capacity"
+CONF_BATTERY_CHARGE_POWER = "battery_charge_power"
+CONF_BATTERY_DISCHARGE_POWER = "battery_discharge_power"
+CONF_BATTERY_EFFICIENCY = "battery_efficiency"
+CONF_EXPORT_LIMIT = "export_limit"
+CONF_CHANGE_THRESHOLD_ENERGY = "change_threshold_energy"
+CONF_CHANGE_THRESHOLD_PEAK = "change_threshold_peak"
+CONF_PRICE_ENTITY = "price_entity"
+CONF_PRICE_WINDOW = "price_window"
+CONF_FLEET = "fleet"
+
+DATA_FLEET = "fleet"
+DATA_SEED = "seed"
+
+EVENT_FORECAST_CHANGED = f"{DOMAIN}_forecast_changed"
+
+SERVICE_GET_TARIFF_PLAN = "get_tariff_plan"
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_PRICES = "prices"
+
+STORAGE_VERSION = 1
 
 TECHNOLOGIES = ['', 'perc', 'monosi', 'multisi', 'cdte', 'topcon']
 
@@ -59,3 +83,5 @@ CONDITION_MAP = {
     for cond_ha, cond_codes in CONDITION_CLASSES.items()
     for cond_code in cond_codes
 }
+
+ATTR_FORECAST_ENERGY_PRODUCTION = "energy_production"
@@ -2,21 +2,61 @@
 
 from __future__ import annotations
 
-from datetime import timedelta
+from collections.abc import Mapping
+from datetime import date, datetime, timedelta
+from math import ceil
+from types import MappingProxyType
+from typing import Any
 
-from .pvnode import Estimate, PVNode, PVNodeConnectionError
+from .battery import Battery, BatteryProjection, project_battery
+from .feedin import ExportForecast, project_export
+from .history import ForecastStatistics
+from .tariff import TariffPlan, plan_tariff, price_unit, prices_from_attributes
+from .pvnode import (
+    PRODUCTION_LEAD,
+    ErrorProfile,
+    Estimate,
+    PVNode,
+    PVNodeConnectionError,
+    Snapshot,
+    diff_estimates,
+    load_profile,
+)
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_API_KEY, CONF_LATITUDE, CONF_LONGITUDE
-from homeassistant.core import HomeAssistant
+from homeassistant.const import (
+    ATTR_UNIT_OF_MEASUREMENT,
+    CONF_API_KEY,
+    CONF_LATITUDE,
+    CONF_LONGITUDE,
+    STATE_UNAVAILABLE,
+    STATE_UNKNOWN,
+    UnitOfPower,
+)
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 from homeassistant.helpers.device_registry import DeviceEntryType, DeviceInfo
 from homeassistant.components.weather import (
      ATTR_CONDITION_CLEAR_NIGHT,
-     ATTR_CONDITION_SUNNY
+     ATTR_CONDITION_SUNNY,
+     ATTR_FORECAST_CONDITION,
+     ATTR_FORECAST_HUMIDITY,
+     ATTR_FORECAST_IS_DAYTIME,
+     ATTR_FORECAST_NATIVE_PRECIPITATION,
+     ATTR_FORECAST_NATIVE_TEMP,
+     ATTR_FORECAST_NATIVE_TEMP_LOW,
+     ATTR_FORECAST_NATIVE_WIND_SPEED,
+     ATTR_FORECAST_TIME,
+     Forecast,
 )
+from homeassistant.const import SUN_EVENT_SUNRISE, SUN_EVENT_SUNSET
 
-from homeassistant.helpers import sun
+from astral import LocationInfo
+from astral.location import Location
+from homeassistant.util import dt as dt_util
+from homeassistant.util.unit_conversion import PowerConverter
 
 from .const import (
     DOMAIN, 
@@ -31,12 +71,49 @@ from .const import (
     CONF_TECHNOLOGY,
     CONF_OBSTRUCTION,
     CONF_WEATHER_ENABLED,
+    CONF_PRODUCTION_ENTITY,
+    CONF_BASE_LOAD,
+    CONF_BATTERY_SOC_ENTITY,
+    CONF_BATTERY_CAPACITY,
+    CONF_BATTERY_CHARGE_POWER,
+    CONF_BATTERY_DISCHARGE_POWER,
+    CONF_BATTERY_EFFICIENCY,
+    CONF_EXPORT_LIMIT,
+    CONF_CHANGE_THRESHOLD_ENERGY,
+    CONF_CHANGE_THRESHOLD_PEAK,
+    CONF_PRICE_ENTITY,
+    CONF_PRICE_WINDOW,
+    DATA_SEED,
+    EVENT_FORECAST_CHANGED,
+    STORAGE_VERSION,
     LOGGER,
-    CONDITION_MAP
+    CONDITION_MAP,
+    ATTR_FORECAST_ENERGY_PRODUCTION
 )
 
 type PVNodeConfigEntry = ConfigEntry[PVNodeDataUpdateCoordinator]
 
+UPDATE_INTERVAL = timedelta(minutes=15)
+NIGHT_UPDATE_INTERVAL = timedelta(hours=1)
+
+
+def create_pvnode(hass: HomeAssistant, data: Mapping[str, Any], options: Mapping[str, Any]) -> PVNode:
+    """Create the PVNode client of a site from its entry data and options."""
+    return PVNode(
+        api_key=options[CONF_API_KEY],
+        latitude=data[CONF_LATITUDE],
+        longitude=data[CONF_LONGITUDE],
+        orientation=options[CONF_ORIENTATION],
+        slope=options[CONF_SLOPE],
+        kWp=options[CONF_KWP],
+        instheight=options[CONF_INSTALLATION_HEIGHT],
+        instdate=options.get(CONF_INSTALLATION_DATE),
+        time_zone=hass.config.time_zone,
+        technology=options[CONF_TECHNOLOGY],
+        obstruction=options[CONF_OBSTRUCTION],
+        weather_enabled=data[CONF_WEATHER_ENABLED]
+    )
+
 
 class PVNodeDataUpdateCoordinator(DataUpdateCoordinator[Estimate]):
     """The PVNode Data Update Coordinator."""
@@ -46,39 +123,264 @@ class PVNodeDataUpdateCoordinator(DataUpdateCoordinator[Estimate]):
     def __init__(self, hass: HomeAssistant, entry: PVNodeConfigEntry) -> None:
         """Initialize the PVNode coordinator."""
 
-        self.forecast = PVNode(
-            api_key=entry.options[CONF_API_KEY],
-            latitude=entry.data[CONF_LATITUDE],
-            longitude=entry.data[CONF_LONGITUDE],
-            orientation=entry.options[CONF_ORIENTATION],
-            slope=entry.options[CONF_SLOPE],
-            kWp=entry.options[CONF_KWP],
-            instheight=entry.options[CONF_INSTALLATION_HEIGHT],
-            instdate=entry.options[CONF_INSTALLATION_DATE],
-            time_zone=hass.config.time_zone,
-            technology=entry.options[CONF_TECHNOLOGY],
-            obstruction=entry.options[CONF_OBSTRUCTION],
-            weather_enabled=entry.data[CONF_WEATHER_ENABLED]
-        )
+        self.forecast = create_pvnode(hass, entry.data, entry.options)
 
         self.entry_id = entry.entry_id
-        update_interval = timedelta(minutes=15)
+        self._location = Location(LocationInfo(
+            "", "", hass.config.time_zone, entry.data[CONF_LATITUDE], entry.data[CONF_LONGITUDE]
+        ))
+        self._sun_table: dict[date, tuple[datetime | None, datetime | None]] = {}
+        self._forecasts: dict[str, list[Forecast]] = {}
+        self._forecasts_key: tuple[Estimate, date] | None = None
+
+        self.production_entity = entry.options.get(CONF_PRODUCTION_ENTITY)
+        self.error_profile = ErrorProfile()
+        self._store: Store[dict] = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}")
+
+        self.load_profile = load_profile(entry.options.get(CONF_BASE_LOAD, ""))
+        self.battery_soc_entity = entry.options.get(CONF_BATTERY_SOC_ENTITY)
+        self.battery = None
+        if self.battery_soc_entity and entry.options.get(CONF_BATTERY_CAPACITY):
+            self.battery = Battery(
+                capacity=entry.options[CONF_BATTERY_CAPACITY] * 1000,
+                charge_power=entry.options[CONF_BATTERY_CHARGE_POWER],
+                discharge_power=entry.options[CONF_BATTERY_DISCHARGE_POWER],
+                efficiency=entry.options[CONF_BATTERY_EFFICIENCY] / 100,
+            )
+        self.battery_projection: BatteryProjection | None = None
+
+        self.export_limit = None
+        if (limit := entry.options.get(CONF_EXPORT_LIMIT, 100)) < 100:
+            self.export_limit = entry.options[CONF_KWP] * 10 * limit
+        self.export_forecast: ExportForecast | None = None
+
+        self.price_entity = entry.options.get(CONF_PRICE_ENTITY)
+        self.price_window = entry.options.get(CONF_PRICE_WINDOW, 3)
+        self.tariff_plan: TariffPlan | None = None
+        self.price_currency: str | None = None
+
+        self.statistics = ForecastStatistics(hass, entry.entry_id, entry.title)
+        self.change_threshold_energy = entry.options.get(CONF_CHANGE_THRESHOLD_ENERGY, 1.0) * 1000
+        self.change_threshold_peak = entry.options.get(CONF_CHANGE_THRESHOLD_PEAK, 60)
+
+        self.snapshot: Snapshot | None = None
+        self._derived_estimate: Estimate | None = None
 
         super().__init__(
             hass,
             LOGGER,
             config_entry=entry,
             name=DOMAIN,
-            update_interval=update_interval,
+            update_interval=UPDATE_INTERVAL,
         )
 
+    async def async_restore(self) -> None:
+        """Load the persisted state of this entry and serve the last forecast."""
+        if (stored := await self._store.async_load()) is None:
+            stored = {}
+        self.error_profile = ErrorProfile.from_dict(stored.get("error_profile", {}))
+
+        # the config flow leaves its validation fetch behind for the first refresh
+        seeds = self.hass.data.get(DOMAIN, {}).get(DATA_SEED, {})
+        if (estimate := seeds.pop(self.forecast.cache_key, None)) is not None:
+            self._store.async_delay_save(self._data_to_store, 60)
+            if "recorder" in self.hass.config.components:
+                self.statistics.async_import(estimate)
+        elif (forecast := stored.get("forecast")) is not None:
+            estimate = Estimate.from_dict(self.forecast.kWp, forecast)
+        else:
+            # entities stay unavailable until the first fetch succeeds
+            self.last_update_success = False
+            return
+
+        self.forecast.estimate_cached = estimate
+        self.data = estimate
+        self.snapshot = self._build_snapshot(estimate)
+
     async def _async_update_data(self) -> Estimate:
         """Fetch PVNode estimates."""
         try:
-            return await self.forecast.estimate()
+            estimate = await self.forecast.estimate(self.sun_times(dt_util.now().date())[0])
         except PVNodeConnectionError as error:
             raise UpdateFailed(error) from error
 
+        if self.production_entity is not None:
+            self._record_production_sample(estimate)
+        if estimate is not self.data:
+            self._store.async_delay_save(self._data_to_store, 60)
+            if "recorder" in self.hass.config.components:
+                self.statistics.async_import(estimate)
+            if self.data is not None:
+                self._fire_forecast_changed(self.data, estimate)
+
+        self.update_interval = self._next_update_interval(estimate)
+        return estimate
+
+    def _next_update_interval(self, estimate: Estimate) -> timedelta:
+        """Tick every 15 minutes during production, sparsely at night."""
+        now = estimate.now()
+        # the battery keeps discharging at night, its projection needs the
+        # ticks, and the current weather comes in 15 minute slots
+        if (
+            self.battery is not None
+            or self.forecast.weather_enabled
+            or estimate.in_production_window(now, PRODUCTION_LEAD)
+        ):
+            return UPDATE_INTERVAL
+
+        # wake up before the next production window, the sun decides for days
+        # the forecast does not cover yet, and at midnight for the new day
+        today = now.date()
+        tomorrow = today + timedelta(days=1)
+        wake_up = estimate.day_interval(tomorrow)[0]
+        for day in (today, tomorrow):
+            window = estimate.production_windows.get(day)
+            sunrise = window[0] if window is not None else self.sun_times(day)[0]
+            if sunrise is not None and sunrise > now:
+                wake_up = min(wake_up, sunrise - PRODUCTION_LEAD)
+                break
+
+        if wake_up <= now:
+            # sunrise is close and the forecast does not cover the day yet
+            return UPDATE_INTERVAL
+        return min(wake_up - now, NIGHT_UPDATE_INTERVAL)
+
+    def _fire_forecast_changed(self, previous: Estimate, estimate: Estimate) -> None:
+        """Fire an event if the new forecast crosses a change threshold."""
+        now = estimate.now()
+        # the first forecast of a day, or one after a stale restore, has
+        # nothing to compare with
+        if not previous.covers(now.date()):
+            return
+        diff = diff_estimates(previous, estimate, now)
+        peak_shift = diff["peak_shift_minutes"]
+        if (
+            abs(diff["today_remaining_delta"]) < self.change_threshold_energy
+            and abs(diff["tomorrow_delta"]) < self.change_threshold_energy
+            and (peak_shift is None or abs(peak_shift) < self.change_threshold_peak)
+        ):
+            return
+
+        self.hass.bus.async_fire(
+            EVENT_FORECAST_CHANGED,
+            {"entry_id": self.entry_id}
+            | {
+                key: value.isoformat() if isinstance(value, datetime) else value
+                for key, value in diff.items()
+            },
+        )
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Evaluate the snapshot once, then update all listeners."""
+        if self.data is not None:
+            self.snapshot = self._build_snapshot(self.data)
+        super().async_update_listeners()
+
+    def _build_snapshot(self, estimate: Estimate) -> Snapshot:
+        """Evaluate every derived value at a single reference time."""
+        if estimate is not self._derived_estimate:
+            estimate.apply_error_profile(self.error_profile.quantiles())
+            if self.export_limit is not None:
+                self.export_forecast = project_export(estimate, self.export_limit, self.load_profile)
+            self._derived_estimate = estimate
+
+        at = estimate.now()
+        today = at.date()
+        tomorrow = today + timedelta(days=1)
+        values = estimate.evaluate(at)
+
+        if "weather_code_now" in values:
+            values["weather_condition_now"] = self.format_condition(values["weather_code_now"], at)
+
+        if self.battery is not None:
+            self.battery_projection = projection = self._project_battery(estimate, at)
+            end_of_today = estimate.day_interval(tomorrow)[0]
+            values["battery_soc_end_of_day"] = projection and projection.soc_at(end_of_today)
+            values["battery_time_to_full"] = projection and projection.time_to_full
+            values["battery_time_to_empty"] = projection and projection.time_to_empty
+            values["battery_grid_export_today"] = projection and projection.export_until(end_of_today)
+
+        if self.export_forecast is not None:
+            export, curtailed, limited = self.export_forecast.day(estimate, today)
+            values["export_energy_today"] = export
+            values["curtailed_energy_today"] = curtailed
+            values["hours_above_export_limit_today"] = limited
+            values["curtailed_energy_tomorrow"] = self.export_forecast.day(estimate, tomorrow)[1]
+
+        if self.price_entity is not None:
+            self.tariff_plan = plan = self.plan_tariff(estimate, at)
+            values["production_value_remaining_today"] = plan and plan.production_value(today)
+            values["production_value_tomorrow"] = plan and plan.production_value(tomorrow)
+            values["cheapest_window_start"] = plan and plan.cheapest_window
+            values["most_valuable_window_start"] = plan and plan.most_valuable_window
+            values["grid_charge_hours"] = plan and len(plan.charge_hours)
+
+        return Snapshot(at, MappingProxyType(values))
+
+    def _project_battery(self, estimate: Estimate, at: datetime) -> BatteryProjection | None:
+        """Project the battery state of charge from its current value."""
+        state = self.hass.states.get(self.battery_soc_entity)
+        try:
+            soc = float(state.state)
+        except (AttributeError, ValueError):
+            return None
+
+        return project_battery(self.battery, soc, at, estimate.wh_hours, self.load_profile)
+
+    def plan_tariff(self, estimate: Estimate, at: datetime, prices: dict[datetime, float] | None = None) -> TariffPlan | None:
+        """Plan against the given prices (per kWh) or those of the price entity."""
+        if prices is None:
+            if self.price_entity is None or (state := self.hass.states.get(self.price_entity)) is None:
+                return None
+            # prices in the price entity's unit, e.g. ct/kWh or EUR/MWh
+            self.price_currency, factor = price_unit(state.attributes.get(ATTR_UNIT_OF_MEASUREMENT))
+            prices = {
+                hour: price * factor
+                for hour, price in prices_from_attributes(state.attributes, dt_util.get_default_time_zone()).items()
+            }
+
+        charge_hours, efficiency = 0, 1.0
+        if self.battery is not None and self.battery.charge_power:
+            charge_hours = ceil(self.battery.capacity / self.battery.charge_power)
+            efficiency = self.battery.efficiency
+
+        try:
+            return plan_tariff(estimate.wh_hours, prices, self.load_profile, at, self.price_window, charge_hours, efficiency)
+        except (AttributeError, TypeError, ValueError) as error:
+            # a broken price series must not take the sensors down with it
+            LOGGER.warning("Cannot plan against the prices of %s: %s", self.price_entity, error)
+            return None
+
+    def _record_production_sample(self, estimate: Estimate) -> None:
+        """Record the ratio of actual to forecast power for the current hour."""
+        state = self.hass.states.get(self.production_entity)
+        if state is None or state.state in (STATE_UNAVAILABLE, STATE_UNKNOWN):
+            return
+        try:
+            actual = PowerConverter.convert(
+                float(state.state),
+                state.attributes.get(ATTR_UNIT_OF_MEASUREMENT, UnitOfPower.WATT),
+                UnitOfPower.WATT,
+            )
+        except (ValueError, HomeAssistantError):
+            return
+
+        now = estimate.now()
+        forecast = estimate.power_production_at_time(now)
+        # ratios around sunrise/sunset are mostly noise
+        if forecast < 50 * self.forecast.kWp:
+            return
+
+        self.error_profile.add(now.hour, actual / forecast)
+        self._store.async_delay_save(self._data_to_store, 60)
+
+    def _data_to_store(self) -> dict:
+        return {
+            "error_profile": self.error_profile.as_dict(),
+            "forecast": self.data.as_dict() if self.data is not None else None,
+        }
+
     def get_device_info(self):
         return DeviceInfo(
             entry_type=DeviceEntryType.SERVICE,
@@ -89,13 +391,112 @@ class PVNodeDataUpdateCoordinator(DataUpdateCoordinator[Estimate]):
             configuration_url=URL,
         )
 
+    def _sun_event(self, event: str, day: date) -> datetime | None:
+        """Return a sun event at the site, None if the sun does not rise or set."""
+        try:
+            return getattr(self._location, event)(date=day, local=False)
+        except ValueError:
+            return None
+
+    def sun_times(self, day: date) -> tuple[datetime | None, datetime | None]:
+        """Return sunrise and sunset of a local day, computed once per day."""
+        if (times := self._sun_table.get(day)) is None:
+            times = (
+                self._sun_event(SUN_EVENT_SUNRISE, day),
+                self._sun_event(SUN_EVENT_SUNSET, day),
+            )
+            self._sun_table = {
+                d: t for d, t in self._sun_table.items() if d >= day - timedelta(days=1)
+            }
+            self._sun_table[day] = times
+        return times
+
+    def sun_is_up(self, when: datetime | None = None) -> bool:
+        """Return whether the sun is up, using the per-day sunrise/sunset table."""
+        if when is None:
+            when = dt_util.now()
+        sunrise, sunset = self.sun_times(dt_util.as_local(when).date())
+        if sunrise is None or sunset is None:
+            # polar day or night, no rise/set to compare against
+            return self._location.solar_elevation(when) > 0
+        return sunrise <= when < sunset
+
     def format_condition(self, weathercode, date = None):
          condition = CONDITION_MAP.get(weathercode)
-         sunisup = True
-         if date is None:
-             sunisup = sun.is_up(self.hass)
-         else:
-             sunisup = sun.is_up(self.hass, date)
-         if condition == ATTR_CONDITION_SUNNY and not sunisup:
+         if condition == ATTR_CONDITION_SUNNY and not self.sun_is_up(date):
              condition = ATTR_CONDITION_CLEAR_NIGHT
-         return condition 
+         return condition
+
+    def _cached_forecast(self, kind: str, build) -> list[Forecast] | None:
+        """Return a forecast list, built once per estimate and day.
+
+        build gets the estimate and the start of the current day, periods
+        ending before it are left out.
+        """
+        if self.data is None:
+            # nothing fetched or restored yet
+            return None
+        today = self.data.now().date()
+        key = self._forecasts_key
+        if key is None or key[0] is not self.data or key[1] != today:
+            self._forecasts = {}
+            self._forecasts_key = (self.data, today)
+        if (forecast := self._forecasts.get(kind)) is None:
+            forecast = self._forecasts[kind] = build(self.data, self.data.day_interval(today)[0])
+        return forecast
+
+    def forecast_hourly(self) -> list[Forecast] | None:
+        """Return the hourly forecast."""
+        return self._cached_forecast("hourly", lambda estimate, since: [
+            {
+                ATTR_FORECAST_TIME: date.isoformat(),
+                ATTR_FORECAST_HUMIDITY: item["RH"],
+                ATTR_FORECAST_NATIVE_TEMP: item["temp"],
+                ATTR_FORECAST_NATIVE_PRECIPITATION: item["precip"],
+                ATTR_FORECAST_NATIVE_WIND_SPEED: item["vwind"],
+                ATTR_FORECAST_CONDITION: self.format_condition(item["weather_code"], date),
+            }
+            for date, item in estimate.weather_hours.items()
+            if "weather_code" in item and date >= since
+        ])
+
+    def forecast_daily(self) -> list[Forecast] | None:
+        """Return the daily forecast."""
+        return self._cached_forecast("daily", lambda estimate, since: [
+            {
+                ATTR_FORECAST_TIME: date.isoformat(),
+                ATTR_FORECAST_HUMIDITY: item["RH"],
+                ATTR_FORECAST_NATIVE_TEMP: item["temp_max"],
+                ATTR_FORECAST_NATIVE_TEMP_LOW: item["temp_min"],
+                ATTR_FORECAST_NATIVE_PRECIPITATION: item["precip"],
+                ATTR_FORECAST_NATIVE_WIND_SPEED: item["vwind"],
+                ATTR_FORECAST_CONDITION: CONDITION_MAP.get(item["weather_code"]),
+                ATTR_FORECAST_ENERGY_PRODUCTION: item["spec_watts"],
+            }
+            for date, item in estimate.weather_days.items()
+            if "weather_code" in item and date >= since
+        ])
+
+    def forecast_twice_daily(self) -> list[Forecast] | None:
+        """Return the twice daily forecast, day from 6:00 and night from 18:00."""
+        def _condition(item, is_daytime):
+            condition = CONDITION_MAP.get(item["weather_code"])
+            if condition == ATTR_CONDITION_SUNNY and not is_daytime:
+                condition = ATTR_CONDITION_CLEAR_NIGHT
+            return condition
+
+        return self._cached_forecast("twice_daily", lambda estimate, since: [
+            {
+                ATTR_FORECAST_TIME: date.isoformat(),
+                ATTR_FORECAST_IS_DAYTIME: date.hour == 6,
+                ATTR_FORECAST_HUMIDITY: item["RH"],
+                ATTR_FORECAST_NATIVE_TEMP: item["temp_max"],
+                ATTR_FORECAST_NATIVE_TEMP_LOW: item["temp_min"],
+                ATTR_FORECAST_NATIVE_PRECIPITATION: item["precip"],
+                ATTR_FORECAST_NATIVE_WIND_SPEED: item["vwind"],
+                ATTR_FORECAST_CONDITION: _condition(item, date.hour == 6),
+                ATTR_FORECAST_ENERGY_PRODUCTION: item["spec_watts"],
+            }
+            for date, item in estimate.weather_half_days.items()
+            if "weather_code" in item and date + timedelta(hours=12) > since
+        ])
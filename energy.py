@@ -5,16 +5,38 @@ from __future__ import annotations
 from homeassistant.core import HomeAssistant
 
 from .coordinator import PVNodeDataUpdateCoordinator
+from .fleet import PVNodeFleetCoordinator
 
 
 async def async_get_solar_forecast(hass: HomeAssistant, config_entry_id: str) -> dict[str, dict[str, float | int]] | None:
     """Get solar forecast for a config entry ID."""
-    if (entry := hass.config_entries.async_get_entry(config_entry_id)) is None or not isinstance(entry.runtime_data, PVNodeDataUpdateCoordinator):
+    if (entry := hass.config_entries.async_get_entry(config_entry_id)) is None:
         return None
 
-    return {
+    if isinstance(entry.runtime_data, PVNodeFleetCoordinator):
+        return {
+            "wh_hours": {
+                timestamp.isoformat(): val
+                for timestamp, val in sorted(entry.runtime_data.data.items())
+            }
+        }
+
+    if not isinstance(entry.runtime_data, PVNodeDataUpdateCoordinator):
+        return None
+
+    if (estimate := entry.runtime_data.data) is None:
+        return None
+
+    forecast = {
         "wh_hours": {
             timestamp.isoformat(): val
-            for timestamp, val in entry.runtime_data.data.wh_hours.items()
+            for timestamp, val in estimate.wh_hours.items()
+        }
+    }
+    for quantile, wh_hours in estimate.wh_quantiles.items():
+        forecast[f"wh_hours_{quantile}"] = {
+            timestamp.isoformat(): val
+            for timestamp, val in wh_hours.items()
         }
-    }
\ No newline at end of file
+
+    return forecast
\ No newline at end of file
@@ -0,0 +1,50 @@
+"""Grid feed-in limit simulation over the PVNode forecast."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, datetime
+
+from .pvnode import Estimate, TimeSeries
+
+
+@dataclass(frozen=True)
+class ExportForecast:
+    """Hourly export, curtailment and time above the feed-in limit."""
+
+    export_hours: TimeSeries
+    curtailed_hours: TimeSeries
+    limited_hours: TimeSeries
+
+    def day(self, estimate: Estimate, specific_date: date) -> tuple[float, float, float]:
+        """Return export Wh, curtailed Wh and hours above the limit of a day."""
+        fr, until = estimate.day_interval(specific_date)
+        return (
+            self.export_hours.sum(fr, until),
+            self.curtailed_hours.sum(fr, until),
+            self.limited_hours.sum(fr, until),
+        )
+
+
+def project_export(estimate: Estimate, limit: float, load: list[float]) -> ExportForecast:
+    """Simulate a feed-in limit (W) on the forecast power slots minus the base load.
+
+    The battery is not taken into account, this is what the inverter would
+    have to curtail without any storage.
+    """
+    slots: dict[datetime, list[float]] = {}
+    for timestamp, watts in estimate.data['spec_watts'].items():
+        hour = timestamp.replace(minute=0, second=0, microsecond=0)
+        slots.setdefault(hour, []).append(max(watts - load[hour.hour], 0))
+
+    export = {}
+    curtailed = {}
+    limited = {}
+    for hour, surplus in slots.items():
+        # every slot covers the same share of its hour
+        share = 1 / len(surplus)
+        export[hour] = sum(min(w, limit) for w in surplus) * share
+        curtailed[hour] = sum(w - limit for w in surplus if w > limit) * share
+        limited[hour] = sum(share for w in surplus if w > limit)
+
+    return ExportForecast(TimeSeries(export), TimeSeries(curtailed), TimeSeries(limited))
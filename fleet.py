@@ -0,0 +1,122 @@
+"""Aggregate of all PVNode sites."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from types import MappingProxyType
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.device_registry import DeviceEntryType, DeviceInfo
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, LOGGER, MANUFACTURER, URL
+from .coordinator import PVNodeConfigEntry, PVNodeDataUpdateCoordinator
+from .pvnode import Estimate, Snapshot
+
+# snapshot values that add up across sites
+FLEET_VALUES = (
+    "energy_production_today",
+    "energy_production_today_remaining",
+    "energy_production_tomorrow",
+    "power_production_now",
+    "energy_current_hour",
+    "energy_next_hour",
+)
+
+
+class PVNodeFleetCoordinator(DataUpdateCoordinator[dict[datetime, float]]):
+    """Keep the totals of all sites, updated by the site that changed."""
+
+    def __init__(self, hass: HomeAssistant, entry: PVNodeConfigEntry) -> None:
+        """Initialize the fleet coordinator."""
+        super().__init__(hass, LOGGER, config_entry=entry, name=f"{DOMAIN}_fleet")
+        self.entry_id = entry.entry_id
+        self.snapshot: Snapshot | None = None
+
+        self._totals = dict.fromkeys(FLEET_VALUES, 0)
+        self._wh_hours: dict[datetime, float] = {}
+        # number of sites covering an hour, hours nobody covers are dropped
+        self._hour_members: dict[datetime, int] = {}
+        self._members: dict[str, tuple[Estimate | None, dict[str, float]]] = {}
+        self._unsubscribe: dict[str, CALLBACK_TYPE] = {}
+        self.data = self._wh_hours
+
+    @callback
+    def async_add_members(self) -> None:
+        """Subscribe to all sites that have their coordinator, loaded or still setting up."""
+        for entry in self.hass.config_entries.async_entries(DOMAIN):
+            if entry.state not in (ConfigEntryState.LOADED, ConfigEntryState.SETUP_IN_PROGRESS):
+                continue
+            if isinstance(getattr(entry, "runtime_data", None), PVNodeDataUpdateCoordinator):
+                self.async_add_member(entry.runtime_data)
+
+    @callback
+    def async_add_member(self, member: PVNodeDataUpdateCoordinator) -> None:
+        """Subscribe to a site and add its current values."""
+        if member.entry_id in self._unsubscribe:
+            return
+        self._members[member.entry_id] = (None, dict.fromkeys(FLEET_VALUES, 0))
+        self._unsubscribe[member.entry_id] = member.async_add_listener(
+            lambda: self._async_member_updated(member)
+        )
+        self._async_member_updated(member)
+
+    @callback
+    def async_remove_member(self, entry_id: str) -> None:
+        """Unsubscribe from a site and take its values out of the totals."""
+        if (unsubscribe := self._unsubscribe.pop(entry_id, None)) is None:
+            return
+        unsubscribe()
+        estimate, values = self._members.pop(entry_id)
+        self._apply(estimate, None, values, dict.fromkeys(FLEET_VALUES, 0))
+
+    @callback
+    def async_shutdown_members(self) -> None:
+        for unsubscribe in self._unsubscribe.values():
+            unsubscribe()
+        self._unsubscribe.clear()
+
+    @callback
+    def _async_member_updated(self, member: PVNodeDataUpdateCoordinator) -> None:
+        """Swap the old contribution of a site for its new one."""
+        if member.snapshot is None:
+            return
+        old_estimate, old_values = self._members[member.entry_id]
+        values = {key: member.snapshot.get(key) or 0 for key in FLEET_VALUES}
+        self._members[member.entry_id] = (member.data, values)
+        self._apply(old_estimate, member.data, old_values, values)
+
+    def _apply(self, old_estimate: Estimate | None, estimate: Estimate | None, old_values: dict[str, float], values: dict[str, float]) -> None:
+        for key in FLEET_VALUES:
+            self._totals[key] += values[key] - old_values[key]
+
+        # the hourly series only changes with a new forecast of that site
+        if estimate is not old_estimate:
+            if old_estimate is not None:
+                for hour, wh in old_estimate.wh_hours.items():
+                    if self._hour_members[hour] == 1:
+                        del self._hour_members[hour], self._wh_hours[hour]
+                    else:
+                        self._hour_members[hour] -= 1
+                        self._wh_hours[hour] -= wh
+            if estimate is not None:
+                for hour, wh in estimate.wh_hours.items():
+                    self._hour_members[hour] = self._hour_members.get(hour, 0) + 1
+                    self._wh_hours[hour] = self._wh_hours.get(hour, 0) + wh
+
+        self.snapshot = Snapshot(dt_util.now(), MappingProxyType(
+            {f"fleet_{key}": value for key, value in self._totals.items()}
+        ))
+        self.async_set_updated_data(self._wh_hours)
+
+    def get_device_info(self) -> DeviceInfo:
+        return DeviceInfo(
+            entry_type=DeviceEntryType.SERVICE,
+            identifiers={(DOMAIN, self.entry_id)},
+            manufacturer=MANUFACTURER,
+            model="Fleet",
+            name="Fleet",
+            configuration_url=URL,
+        )
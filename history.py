@@ -0,0 +1,84 @@
+"""Forecast history as external long-term statistics."""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+from homeassistant.components.recorder.models import (
+    StatisticData,
+    StatisticMeanType,
+    StatisticMetaData,
+)
+from homeassistant.components.recorder.statistics import async_add_external_statistics
+from homeassistant.const import (
+    PERCENTAGE,
+    UnitOfEnergy,
+    UnitOfSpeed,
+    UnitOfTemperature,
+    UnitOfVolumetricFlux,
+)
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util.unit_conversion import (
+    EnergyConverter,
+    SpeedConverter,
+    TemperatureConverter,
+)
+
+from .const import DOMAIN
+from .pvnode import Estimate
+
+# statistic name: (weather_hours column, unit, unit class)
+FORECAST_STATISTICS = {
+    "energy": ("spec_watts", UnitOfEnergy.WATT_HOUR, EnergyConverter.UNIT_CLASS),
+    "temperature": ("temp", UnitOfTemperature.CELSIUS, TemperatureConverter.UNIT_CLASS),
+    "humidity": ("RH", PERCENTAGE, None),
+    "precipitation": ("precip", UnitOfVolumetricFlux.MILLIMETERS_PER_HOUR, None),
+    "wind_speed": ("vwind", UnitOfSpeed.METERS_PER_SECOND, SpeedConverter.UNIT_CLASS),
+}
+
+
+class ForecastStatistics:
+    """Import the hourly forecast of an entry into long-term statistics."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str, title: str) -> None:
+        self.hass = hass
+        self.title = title
+        self.prefix = f"{DOMAIN}:forecast_{entry_id.lower()}"
+        self._imported: dict[str, dict[datetime, float]] = {}
+
+    @callback
+    def async_import(self, estimate: Estimate) -> None:
+        """Import the hours that changed since the last import, one call per series."""
+        first_hour = next(iter(estimate.weather_hours), None)
+
+        for name, (column, unit, unit_class) in FORECAST_STATISTICS.items():
+            statistic_id = f"{self.prefix}_{name}"
+            imported = self._imported.setdefault(statistic_id, {})
+
+            statistics = [
+                StatisticData(start=hour, mean=values[column])
+                for hour, values in estimate.weather_hours.items()
+                if column in values and imported.get(hour) != values[column]
+            ]
+            if not statistics:
+                continue
+
+            async_add_external_statistics(
+                self.hass,
+                StatisticMetaData(
+                    mean_type=StatisticMeanType.ARITHMETIC,
+                    has_sum=False,
+                    name=f"{self.title} forecast {name.replace('_', ' ')}",
+                    source=DOMAIN,
+                    statistic_id=statistic_id,
+                    unit_class=unit_class,
+                    unit_of_measurement=unit,
+                ),
+                statistics,
+            )
+
+            for row in statistics:
+                imported[row["start"]] = row["mean"]
+            # hours before the current forecast will not change anymore
+            for hour in [hour for hour in imported if hour < first_hour]:
+                del imported[hour]
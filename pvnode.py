@@ -1,39 +1,294 @@
+"""PVNode forecast client, usable without Home Assistant.
+
+Run ``python pvnode.py --help`` to fetch a forecast or read a saved
+response and print the derived values.
+"""
+
+from __future__ import annotations
+
 from datetime import date, datetime, timedelta
 from zoneinfo import ZoneInfo
 from dataclasses import dataclass
-import requests, asyncio
+from types import MappingProxyType
+from typing import Any
+from bisect import bisect_right
+from collections import deque
+from itertools import accumulate
+import codecs, json, sys
+
+QUANTILES = ('p10', 'p50', 'p90')
+# columns fetched together, each group on its own refresh interval
+FETCH_GROUPS = {
+    'pv': 'spec_watts',
+    'weather': 'temp,RH,precip,vwind,weather_code',
+}
+FETCH_INTERVALS = {
+    'pv': timedelta(hours=3),
+    'weather': timedelta(hours=8),
+}
+# start refreshing this long before the first production of a day
+PRODUCTION_LEAD = timedelta(hours=1)
+WEATHER_NOW = {
+    'weather_temperature_now': 'temp',
+    'weather_precipitation_now': 'precip',
+    'weather_humidity_now': 'RH',
+    'weather_code_now': 'weather_code',
+    'weather_wind_speed_now': 'vwind',
+}
+
+
+class TimeSeries:
+    """Sorted time series with prefix sums for O(log n) lookups and range sums."""
+
+    __slots__ = ('timestamps', 'values', 'prefix')
+
+    def __init__(self, data: dict[datetime, float]):
+        items = sorted(data.items())
+        self.timestamps = [timestamp for timestamp, _ in items]
+        self.values = [value for _, value in items]
+        self.prefix = list(accumulate(self.values, initial=0))
+
+    def bounds(self, interval_begin: datetime, interval_end: datetime) -> tuple[int, int]:
+        """Return the index range of timestamps in (interval_begin, interval_end]."""
+        return (
+            bisect_right(self.timestamps, interval_begin),
+            bisect_right(self.timestamps, interval_end),
+        )
 
+    def sum(self, interval_begin: datetime, interval_end: datetime) -> float:
+        """Return the sum of values in (interval_begin, interval_end]."""
+        lo, hi = self.bounds(interval_begin, interval_end)
+        return self.prefix[hi] - self.prefix[lo]
 
-def _interval_value_sum(interval_begin: datetime, interval_end: datetime, data: dict[datetime, int]) -> int:
+
+def _interval_value_sum(interval_begin: datetime, interval_end: datetime, series: TimeSeries) -> int:
     """Return the sum of values in interval."""
-    total = 0
+    return series.sum(interval_begin, interval_end)
 
-    for timestamp, wh in data.items():
-        # Skip all until this hour
-        if timestamp <= interval_begin:
-            continue
 
-        if timestamp > interval_end:
-            break
+def _timed_value(at: datetime, series: TimeSeries) -> int | None:
+    """Return the value for a specific time."""
+    idx = bisect_right(series.timestamps, at)
+    if idx == 0 or idx == len(series.timestamps):
+        return None
+    return series.values[idx - 1]
+
+
+class _Columns:
+    """Forecast rows stored column-wise, keyed by naive local timestamp."""
+
+    def __init__(self):
+        self.index: dict[datetime, int] = {}
+        self.columns: dict[str, list] = {}
+
+    def add(self, row: dict) -> None:
+        dtm = datetime.fromisoformat(row['dtm']).replace(tzinfo=None)
+        if (i := self.index.get(dtm)) is None:
+            i = self.index[dtm] = len(self.index)
+        for key, value in row.items():
+            if key == 'dtm':
+                continue
+            column = self.columns.setdefault(key, [])
+            if len(column) <= i:
+                column.extend([None] * (i + 1 - len(column)))
+            column[i] = value
+
+    def rows(self):
+        """Yield the rows in time order, one at a time."""
+        for dtm, i in sorted(self.index.items()):
+            row = {'dtm': dtm.isoformat()}
+            for key, column in self.columns.items():
+                if i < len(column) and column[i] is not None:
+                    row[key] = column[i]
+            yield row
+
+
+class _JSONStream:
+    """Incremental reader over a chunked JSON document."""
+
+    _decoder = json.JSONDecoder()
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self.eof = True
+            text = self._text.decode(b'', final=True)
+        else:
+            text = self._text.decode(chunk)
+        self.buf = self.buf[self.pos:] + text
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                raise ValueError('unexpected end of JSON document')
+
+    def skip(self, char: str) -> bool:
+        """Consume char if it is next."""
+        if self.peek() != char:
+            return False
+        self.pos += 1
+        return True
+
+    def expect(self, char: str) -> None:
+        if not self.skip(char):
+            raise ValueError(f'expected {char!r} at position {self.pos}')
+
+    def value(self):
+        """Decode the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buf, self.pos)
+                # a number could continue in the next chunk
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+
+def _stream_json(chunks):
+    """Yield the (key, value) pairs of a JSON object, the 'values' rows one by one."""
+    stream = _JSONStream(chunks)
+    stream.expect('{')
+    while not stream.skip('}'):
+        key = stream.value()
+        stream.expect(':')
+        if key == 'values':
+            stream.expect('[')
+            while not stream.skip(']'):
+                yield key, stream.value()
+                stream.skip(',')
+        else:
+            yield key, stream.value()
+        stream.skip(',')
+
+
+def _quantile(values: list[float], q: float) -> float:
+    """Return the nearest-rank quantile of sorted values."""
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def _add_period(periods: dict[datetime, dict], start: datetime, hour: dict) -> None:
+    """Fold one hourly bucket into a daily or half-daily aggregate."""
+    period = periods.get(start)
+    if period is None:
+        period = periods[start] = {'hours': 0, 'spec_watts': 0}
+
+    period['hours'] += 1
+    for k, v in hour.items():
+        if k == 'spec_watts' or k == 'precip':
+            period[k] = period.get(k, 0) + v
+        elif k == 'temp':
+            period['temp_min'] = min(period.get('temp_min', v), v)
+            period['temp_max'] = max(period.get('temp_max', v), v)
+        elif k == 'vwind':
+            period[k] = max(period.get(k, v), v)
+        elif k == 'RH':
+            period[k] = period.get(k, 0) + v
+        elif k == 'weather_code':
+            codes = period.setdefault('weather_codes', {})
+            codes[v] = codes.get(v, 0) + 1
+
+
+def _finish_periods(periods: dict[datetime, dict]) -> None:
+    """Turn accumulated period sums into their final values."""
+    for period in periods.values():
+        if 'RH' in period:
+            period['RH'] /= period['hours']
+        if (codes := period.pop('weather_codes', None)) is not None:
+            # most frequent code wins, ties go to the more severe (higher) code
+            period['weather_code'] = max(codes, key=lambda c: (codes[c], c))
+
+
+def load_profile(value: str) -> list[float]:
+    """Parse a base load of one value or 24 comma separated hourly values (W)."""
+    loads = [float(v) for v in value.split(',')] if value.strip() else [0.0]
+    if len(loads) == 1:
+        loads *= 24
+    if len(loads) != 24 or min(loads) < 0:
+        raise ValueError("base load needs one or 24 non-negative values")
+    return loads
+
 
-        total += wh
+class PVNodeConnectionError(Exception):
+    '''PVNode connection error'''
 
-    return total
 
+class PVNodeAuthError(PVNodeConnectionError):
+    '''PVNode rejected the API key'''
 
-def _timed_value(at: datetime, data: dict[datetime, int]) -> int | None:
-    """Return the value for a specific time."""
-    value = None
-    for timestamp, cur_value in data.items():
-        if timestamp > at:
-            return value
-        value = cur_value
 
-    return None
+class PVNodeParameterError(PVNodeConnectionError):
+    '''PVNode rejected the site parameters'''
 
 
-class PVNodeConnectionError(Exception):
-    '''PVNode connection error'''
+class ErrorProfile:
+    """Observed actual/forecast power ratios per hour of day."""
+
+    def __init__(self, samples: dict[int, list[float]] | None = None, maxlen: int = 120):
+        self.maxlen = maxlen
+        self.samples = {
+            hour: deque(ratios, maxlen=maxlen)
+            for hour, ratios in (samples or {}).items()
+        }
+
+    def add(self, hour: int, ratio: float) -> None:
+        if hour not in self.samples:
+            self.samples[hour] = deque(maxlen=self.maxlen)
+        self.samples[hour].append(ratio)
+
+    def quantiles(self, min_samples: int = 8) -> dict[int, tuple[float, ...]]:
+        """Return P10/P50/P90 ratios per hour, pooled over all hours where sparse."""
+        pooled = sorted(ratio for ratios in self.samples.values() for ratio in ratios)
+        if len(pooled) < min_samples:
+            return {}
+
+        default = tuple(_quantile(pooled, int(q[1:]) / 100) for q in QUANTILES)
+        result = {}
+        for hour in range(24):
+            ratios = sorted(self.samples.get(hour, ()))
+            if len(ratios) < min_samples:
+                result[hour] = default
+            else:
+                result[hour] = tuple(_quantile(ratios, int(q[1:]) / 100) for q in QUANTILES)
+        return result
+
+    def as_dict(self) -> dict[str, list[float]]:
+        return {str(hour): list(ratios) for hour, ratios in self.samples.items()}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, list[float]]) -> ErrorProfile:
+        return cls({int(hour): ratios for hour, ratios in data.items()})
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """Derived values of an Estimate evaluated at one reference time."""
+
+    at: datetime
+    values: MappingProxyType
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.values.get(key, default)
 
 
 @dataclass
@@ -43,10 +298,13 @@ class Estimate:
         self.kWp = kWp
         self.api_timezone = ZoneInfo(data['data_timezone'])
         self.last_update = self.now()
+        self.fetched = {}
 
         
         self.wh_hours = {}
         self.weather_hours = {}
+        self.weather_days = {}
+        self.weather_half_days = {}
         self.data = {}
 
         def _add_measurement(dt, date, key, value):
@@ -86,8 +344,90 @@ class Estimate:
                 else:
                     self.weather_hours[t][k] = sum(m) / len(m)
 
-            self.wh_hours[t] = v['spec_watts']
+            if 'spec_watts' in v:
+                self.wh_hours[t] = v['spec_watts']
+
+            _add_period(self.weather_days, t.replace(hour=0), v)
+            if t.hour < 6:
+                # early morning hours belong to the previous evening's night
+                half_day = t.replace(hour=18) - timedelta(days=1)
+            elif t.hour < 18:
+                half_day = t.replace(hour=6)
+            else:
+                half_day = t.replace(hour=18)
+            _add_period(self.weather_half_days, half_day, v)
+
+        _finish_periods(self.weather_days)
+        _finish_periods(self.weather_half_days)
+
+        self._index = {key: TimeSeries(values) for key, values in self.data.items()}
+
+        # per day from the first producing slot up to the slot after the last
+        self.production_windows = {}
+        slots = list(self.data.get('spec_watts', {}).items())
+        for i, (dt, watts) in enumerate(slots):
+            if watts > 0:
+                end = slots[i + 1][0] if i + 1 < len(slots) else dt
+                first, _ = self.production_windows.get(dt.date(), (dt, end))
+                self.production_windows[dt.date()] = (first, end)
+        self._day_totals = {}
+        self._day_peaks = {}
+        self._wh_index = TimeSeries(self.wh_hours)
+
+        # quantile series, derived from an error profile via apply_error_profile()
+        self.wh_quantiles = {}
+        self._quantile_index = {}
+
+    @classmethod
+    def from_dict(cls, kWp: float, stored: dict) -> Estimate:
+        """Restore an estimate saved with as_dict()."""
+        estimate = cls(kWp, stored)
+        estimate.last_update = datetime.fromisoformat(stored['last_update'])
+        estimate.fetched = {
+            group: datetime.fromisoformat(fetched)
+            for group, fetched in stored.get('fetched', {}).items()
+        }
+        return estimate
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the estimate in the API response format, independent of kWp."""
+        rows = {}
+        for key, values in self.data.items():
+            scale = self.kWp if key == 'spec_watts' else 1
+            for dt, value in values.items():
+                if dt not in rows:
+                    dtm = (dt + timedelta(minutes=1)).replace(tzinfo=None).isoformat()
+                    rows[dt] = {'dtm': dtm}
+                rows[dt][key] = value / scale
+
+        return {
+            'data_timezone': self.api_timezone.key,
+            'last_update': self.last_update.isoformat(),
+            'fetched': {group: fetched.isoformat() for group, fetched in self.fetched.items()},
+            'values': [rows[dt] for dt in sorted(rows)],
+        }
 
+    def in_production_window(self, at: datetime, lead: timedelta = timedelta()) -> bool:
+        """Return whether at lies within the day's production window, widened by lead."""
+        if (window := self.production_windows.get(at.date())) is None:
+            return False
+        return window[0] - lead <= at < window[1]
+
+    def covers(self, day: date) -> bool:
+        """Return whether the estimate has PV data for a day."""
+        fr, until = self.day_interval(day)
+        lo, hi = self._wh_index.bounds(fr, until)
+        return lo < hi
+
+    def apply_error_profile(self, profile: dict[int, tuple[float, ...]]) -> None:
+        """Derive the quantile series from hourly actual/forecast ratios."""
+        self.wh_quantiles = {}
+        if profile:
+            self.wh_quantiles = {
+                q: {t: wh * profile[t.hour][i] for t, wh in self.wh_hours.items()}
+                for i, q in enumerate(QUANTILES)
+            }
+        self._quantile_index = {q: TimeSeries(v) for q, v in self.wh_quantiles.items()}
 
     @property
     def energy_production_today(self) -> int:
@@ -96,12 +436,7 @@ class Estimate:
 
     @property
     def energy_production_today_remaining(self) -> int:
-        return _interval_value_sum(
-            self.now(),
-            self.now().replace(hour=0, minute=0, second=0, microsecond=0)
-            + timedelta(days=1),
-            self.wh_hours,
-        )
+        return self.remaining_production(self.now())
 
 
     @property
@@ -128,7 +463,7 @@ class Estimate:
 
     @property
     def energy_current_hour(self) -> int:
-        return _timed_value(self.now().replace(minute=0, second=0, microsecond=0), self.wh_hours) or 0
+        return self.hour_production(self.now())
     
 
     @property
@@ -142,32 +477,118 @@ class Estimate:
 
 
     def power_production_at_time(self, time: datetime) -> int:
-        return _timed_value(time, self.data['spec_watts']) or 0
+        return _timed_value(time, self._index['spec_watts']) or 0
 
 
-    def sum_energy_production(self, period_hours: int) -> int:
-        now = self.now().replace(minute=59, second=59, microsecond=999)
+    def sum_energy_production(self, period_hours: int, at: datetime | None = None) -> int:
+        now = (at or self.now()).replace(minute=59, second=59, microsecond=999)
         until = now + timedelta(hours=period_hours)
 
-        return _interval_value_sum(now, until, self.wh_hours)
+        return _interval_value_sum(now, until, self._wh_index)
 
 
-    def day_production(self, specific_date: date) -> int:
-        fr = datetime.combine(specific_date, datetime.min.time(), self.api_timezone)
-        until = datetime.combine(specific_date, datetime.max.time(), self.api_timezone)
+    def energy_between(self, interval_begin: datetime, interval_end: datetime) -> int:
+        return _interval_value_sum(interval_begin, interval_end, self._wh_index)
 
-        return _interval_value_sum(fr, until, self.wh_hours)
 
+    def remaining_production(self, at: datetime) -> int:
+        return _interval_value_sum(
+            at,
+            at.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1),
+            self._wh_index,
+        )
 
-    def peak_production_time(self, specific_date: date) -> datetime:
-        value = max(
-            (watt for date, watt in self.data['spec_watts'].items() if date.date() == specific_date),
-            default=None,
+
+    def hour_production(self, at: datetime) -> int:
+        return _timed_value(at.replace(minute=0, second=0, microsecond=0), self._wh_index) or 0
+
+
+    def day_interval(self, specific_date: date) -> tuple[datetime, datetime]:
+        return (
+            datetime.combine(specific_date, datetime.min.time(), self.api_timezone),
+            datetime.combine(specific_date, datetime.max.time(), self.api_timezone),
         )
-        for timestamp, watt in self.data['spec_watts'].items():
-            if watt == value:
-                return timestamp
-        raise RuntimeError("No peak production time found")
+
+
+    def day_production(self, specific_date: date, quantile: str | None = None) -> int | None:
+        fr, until = self.day_interval(specific_date)
+
+        if quantile is None:
+            if (total := self._day_totals.get(specific_date)) is None:
+                total = self._day_totals[specific_date] = _interval_value_sum(fr, until, self._wh_index)
+            return total
+        if quantile not in self._quantile_index:
+            return None
+        return _interval_value_sum(fr, until, self._quantile_index[quantile])
+
+
+    def peak_production_time(self, specific_date: date) -> datetime:
+        if specific_date not in self._day_peaks:
+            series = self._index['spec_watts']
+            lo, hi = series.bounds(
+                datetime.combine(specific_date, datetime.min.time(), self.api_timezone) - timedelta(microseconds=1),
+                datetime.combine(specific_date, datetime.max.time(), self.api_timezone),
+            )
+            self._day_peaks[specific_date] = (
+                series.timestamps[max(range(lo, hi), key=series.values.__getitem__)] if lo < hi else None
+            )
+
+        if (peak := self._day_peaks[specific_date]) is None:
+            raise RuntimeError("No peak production time found")
+        return peak
+
+
+    def evaluate(self, at: datetime | None = None) -> dict[str, Any]:
+        """Return all derived values at a single reference time."""
+        at = (at or self.now()).astimezone(self.api_timezone)
+        today = at.date()
+        tomorrow = today + timedelta(days=1)
+
+        values = {
+            'energy_production_today': self.day_production(today),
+            'energy_production_today_p10': self.day_production(today, 'p10'),
+            'energy_production_today_p90': self.day_production(today, 'p90'),
+            'energy_production_tomorrow': self.day_production(tomorrow),
+            'power_production_next_12hours': self.power_production_at_time(at + timedelta(hours=12)),
+            'power_production_next_24hours': self.power_production_at_time(at + timedelta(hours=24)),
+            'last_update': self.last_update,
+        }
+
+        window = self.production_windows.get(today)
+        hour = at.replace(minute=0, second=0, microsecond=0)
+        next_hour = at + timedelta(hours=1)
+        if window is None or hour >= window[1]:
+            # the day's production is over, nothing left to look up today
+            values['energy_production_today_remaining'] = 0
+            values['power_production_now'] = 0
+            values['energy_current_hour'] = 0
+            if next_hour < self.day_interval(tomorrow)[0]:
+                values['power_production_next_hour'] = 0
+                values['energy_next_hour'] = 0
+        elif at < window[0].replace(minute=0):
+            # before sunrise the whole day is still to come
+            values['energy_production_today_remaining'] = values['energy_production_today']
+            values['power_production_now'] = 0
+            values['energy_current_hour'] = 0
+        else:
+            values['energy_production_today_remaining'] = self.remaining_production(at)
+            values['power_production_now'] = self.power_production_at_time(at)
+            values['energy_current_hour'] = self.hour_production(at)
+        if 'energy_next_hour' not in values:
+            values['power_production_next_hour'] = self.power_production_at_time(next_hour)
+            values['energy_next_hour'] = self.sum_energy_production(1, at)
+
+        for key, day in (('today', today), ('tomorrow', tomorrow)):
+            try:
+                values[f'power_highest_peak_time_{key}'] = self.peak_production_time(day)
+            except RuntimeError:
+                values[f'power_highest_peak_time_{key}'] = None
+        for key, column in WEATHER_NOW.items():
+            if column in self._index:
+                # None rather than a made up 0 when no slot covers at
+                values[key] = _timed_value(at, self._index[column])
+
+        return values
 
 
     def get_last_update(self) -> datetime:
@@ -175,28 +596,74 @@ class Estimate:
 
     
     @property
-    def weather_temperature_now(self) -> int:
-        return _timed_value(self.now(), self.data["temp"]) or 0
+    def weather_temperature_now(self) -> int | None:
+        return _timed_value(self.now(), self._index["temp"])
 
 
     @property
-    def weather_precipitation_now(self) -> int:
-        return _timed_value(self.now(), self.data["precip"]) or 0
+    def weather_precipitation_now(self) -> int | None:
+        return _timed_value(self.now(), self._index["precip"])
 
 
     @property
-    def weather_humidity_now(self) -> int:
-        return _timed_value(self.now(), self.data["RH"]) or 0
+    def weather_humidity_now(self) -> int | None:
+        return _timed_value(self.now(), self._index["RH"])
 
 
     @property
-    def weather_code_now(self) -> int:
-        return _timed_value(self.now(), self.data["weather_code"]) or 0
+    def weather_code_now(self) -> int | None:
+        return _timed_value(self.now(), self._index["weather_code"])
 
 
     @property
-    def weather_wind_speed_now(self) -> int:
-        return _timed_value(self.now(), self.data["vwind"]) or 0
+    def weather_wind_speed_now(self) -> int | None:
+        return _timed_value(self.now(), self._index["vwind"])
+
+
+def diff_estimates(previous: Estimate, current: Estimate, at: datetime) -> dict[str, Any]:
+    """Summarize how the current estimate differs from the previous one from at onward."""
+    hour = at.replace(minute=0, second=0, microsecond=0)
+    today = at.date()
+    tomorrow = today + timedelta(days=1)
+
+    # align both hourly series on the hours they have in common, hours only
+    # one of them covers are not a change
+    max_delta = 0
+    max_delta_hour = None
+    total_delta = 0
+    day_deltas = {today: 0, tomorrow: 0}
+    for timestamp, wh in current.wh_hours.items():
+        if timestamp < hour or (before := previous.wh_hours.get(timestamp)) is None:
+            continue
+        delta = wh - before
+        total_delta += abs(delta)
+        if (day := timestamp.date()) in day_deltas:
+            day_deltas[day] += delta
+        if abs(delta) > abs(max_delta):
+            max_delta = delta
+            max_delta_hour = timestamp
+
+    def _peak(estimate):
+        try:
+            return estimate.peak_production_time(today)
+        except RuntimeError:
+            return None
+
+    peak_before = _peak(previous)
+    peak_after = _peak(current)
+    peak_shift = None
+    if peak_before is not None and peak_after is not None:
+        peak_shift = (peak_after - peak_before) / timedelta(minutes=1)
+
+    return {
+        'today_remaining_delta': day_deltas[today],
+        'tomorrow_delta': day_deltas[tomorrow],
+        'peak_time_today': peak_after,
+        'peak_shift_minutes': peak_shift,
+        'max_hour_delta': max_delta,
+        'max_hour_delta_time': max_delta_hour,
+        'total_hour_delta': total_delta,
+    }
 
 
 class PVNode:
@@ -216,15 +683,90 @@ class PVNode:
         self.technology = technology
         self.obstruction = obstruction
         self.weather_enabled = weather_enabled
+
+    @property
+    def cache_key(self) -> tuple:
+        """Identify the forecast these settings fetch."""
+        return (
+            self.api_key, self.latitude, self.longitude, self.slope, self.orientation, self.kWp,
+            self.instheight, self.instdate, self.time_zone, self.technology, self.obstruction,
+            self.weather_enabled,
+        )
     
-    async def estimate(self):
-        if self.estimate_cached and self.estimate_cached.now() < (self.estimate_cached.last_update + timedelta(hours=8)):
+    @property
+    def groups(self) -> list[str]:
+        return ['pv', 'weather'] if self.weather_enabled else ['pv']
+
+    def due_groups(self, now: datetime | None = None, sunrise: datetime | None = None) -> list[str]:
+        """Return the column groups that need to be fetched.
+
+        PV is refreshed inside the production window only, a day it does not
+        cover yet is fetched from PRODUCTION_LEAD before its sunrise on.
+        Weather is refreshed on its own interval around the clock and at the
+        start of a new day.
+        """
+        cached = self.estimate_cached
+        if cached is None:
+            return self.groups
+
+        now = now or cached.now()
+        due = []
+        for group in self.groups:
+            fetched = cached.fetched.get(group)
+            if fetched is None:
+                due.append(group)
+            elif group != 'pv':
+                if now - fetched >= FETCH_INTERVALS[group] or fetched.astimezone(now.tzinfo).date() != now.date():
+                    due.append(group)
+            elif not cached.covers(now.date()):
+                if sunrise is None or now >= sunrise - PRODUCTION_LEAD:
+                    due.append(group)
+            elif cached.in_production_window(now, PRODUCTION_LEAD) and now - fetched >= FETCH_INTERVALS[group]:
+                due.append(group)
+        return due
+
+    async def estimate(self, sunrise: datetime | None = None):
+        if not (groups := self.due_groups(sunrise=sunrise)):
             return self.estimate_cached
 
-        self.estimate_cached = await asyncio.get_running_loop().run_in_executor(None, self._estimate) 
+        import asyncio
+
+        self.estimate_cached = await asyncio.get_running_loop().run_in_executor(
+            None, self._estimate, groups, self.estimate_cached
+        )
         return self.estimate_cached
 
-    def _estimate(self):
+    def _estimate(self, groups=None, previous=None):
+        """Fetch the given column groups and merge them with the previous estimate."""
+        groups = groups or self.groups
+        rows = _Columns()
+        data_timezone = None
+        for group in groups:
+            data_timezone = self._fetch(FETCH_GROUPS[group], rows)
+
+        kept = []
+        if previous is not None and rows.index:
+            # carry over the columns of groups that were not refreshed
+            kept = [group for group in self.groups if group not in groups and group in previous.fetched]
+            columns = {column for group in kept for column in FETCH_GROUPS[group].split(',')}
+            cutoff = min(rows.index)
+            for row in previous.as_dict()['values'] if columns else ():
+                if datetime.fromisoformat(row['dtm']) >= cutoff:
+                    rows.add({key: value for key, value in row.items() if key == 'dtm' or key in columns})
+
+        estimate = Estimate(self.kWp, {
+            'data_timezone': data_timezone,
+            'values': rows.rows(),
+        })
+        estimate.fetched = {group: estimate.last_update for group in groups}
+        estimate.fetched |= {group: previous.fetched[group] for group in kept}
+        return estimate
+
+    def _fetch(self, required_data, rows):
+        """Stream the forecast of the required columns into rows, return its timezone."""
+        import requests
+        from urllib3.util.request import ACCEPT_ENCODING
+
         url = 'https://api.pvnode.com/v1/forecast/'
         body = {
             "latitude": self.latitude,
@@ -233,7 +775,7 @@ class PVNode:
             "orientation": self.orientation,
             "past_days": 0,
             "forecast_days": 1,
-            "required_data": "spec_watts",
+            "required_data": required_data,
             "installation_height": self.instheight,
             "timezone": self.time_zone,
         }
@@ -243,20 +785,122 @@ class PVNode:
             body["pv_technology_type"] =  self.technology
         if self.obstruction and len(self.obstruction) > 0:
             body["sky_obstruction_config"] = self.obstruction
-        if self.weather_enabled:
-            body["required_data"] = "spec_watts,temp,RH,precip,vwind,weather_code"
-        
+
         headers = {
-            'Authorization': 'Bearer ' + self.api_key
+            'Authorization': 'Bearer ' + self.api_key,
+            'Accept-Encoding': ACCEPT_ENCODING,
         }
 
-        response = requests.get(url, headers=headers, params=body)
-
-        if response.status_code == 400:
-            raise PVNodeConnectionError('API Key wrong?')
-        elif response.status_code == 404:
-            raise PVNodeConnectionError(f"Parameters wrong? {response.json()['detail']}")
-        elif response.status_code > 400:
-            raise PVNodeConnectionError('Something went wrong ...')
-
-        return Estimate(self.kWp, response.json())
+        try:
+            with requests.get(url, headers=headers, params=body, stream=True) as response:
+                if response.status_code == 400:
+                    raise PVNodeAuthError(_error_detail(response, 'API Key wrong?'))
+                elif response.status_code == 404:
+                    raise PVNodeParameterError(_error_detail(response, 'Parameters wrong?'))
+                elif response.status_code > 400:
+                    raise PVNodeConnectionError('Something went wrong ...')
+
+                data_timezone = None
+                for key, value in _stream_json(response.iter_content(chunk_size=16384)):
+                    if key == 'values':
+                        rows.add(value)
+                    elif key == 'data_timezone':
+                        data_timezone = value
+        except ValueError as error:
+            raise PVNodeConnectionError(f'Invalid response: {error}') from error
+        except requests.RequestException as error:
+            raise PVNodeConnectionError(f'Request failed: {error}') from error
+
+        return data_timezone
+
+
+def _error_detail(response, default: str) -> str:
+    """Return the error detail the API sent along with a failed request."""
+    try:
+        detail = response.json()['detail']
+    except (ValueError, KeyError, TypeError):
+        return default
+    return detail if isinstance(detail, str) else json.dumps(detail)
+
+
+def _load(path: str, kWp: float) -> Estimate:
+    """Build an estimate from a saved API response or a saved estimate."""
+    rows = _Columns()
+    data = {}
+
+    def _chunks():
+        with open(path, 'rb') as file:
+            while chunk := file.read(65536):
+                yield chunk
+
+    for key, value in _stream_json(_chunks()):
+        if key == 'values':
+            rows.add(value)
+        else:
+            data[key] = value
+    data['values'] = rows.rows()
+
+    if 'last_update' in data:
+        return Estimate.from_dict(kWp, data)
+    return Estimate(kWp, data)
+
+
+def main(argv: list[str] | None = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='pvnode', description='Fetch or read a PVNode forecast and print the derived values.')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--file', help='saved API response or estimate (JSON)')
+    source.add_argument('--api-key', help='fetch from the API with this key')
+    parser.add_argument('--kwp', type=float, required=True, help='kilowatts peak of the modules')
+    parser.add_argument('--latitude', type=float)
+    parser.add_argument('--longitude', type=float)
+    parser.add_argument('--slope', type=int, default=30)
+    parser.add_argument('--orientation', type=int, default=180)
+    parser.add_argument('--instheight', type=int, default=0)
+    parser.add_argument('--instdate', default='')
+    parser.add_argument('--technology', default='')
+    parser.add_argument('--obstruction', default='')
+    parser.add_argument('--timezone', default='UTC')
+    parser.add_argument('--weather', action='store_true', help='also fetch the weather columns')
+    parser.add_argument('--save', help='write the estimate to this file (JSON)')
+    parser.add_argument('--at', help='reference time (ISO 8601), defaults to now')
+    parser.add_argument('--range', nargs=2, metavar=('BEGIN', 'END'), action='append', default=[], help='print the energy in (BEGIN, END]')
+    args = parser.parse_args(argv)
+
+    if args.file:
+        estimate = _load(args.file, args.kwp)
+    else:
+        if args.latitude is None or args.longitude is None:
+            parser.error('--latitude and --longitude are required to fetch')
+        try:
+            estimate = PVNode(
+                args.api_key, args.latitude, args.longitude, args.slope, args.orientation, args.kwp,
+                args.instheight, args.instdate, args.timezone, args.technology, args.obstruction,
+                weather_enabled=args.weather,
+            )._estimate()
+        except PVNodeConnectionError as error:
+            print(f'error: {error}', file=sys.stderr)
+            return 1
+
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(estimate.as_dict(), file)
+
+    def _time(value: str) -> datetime:
+        dt = datetime.fromisoformat(value)
+        return dt if dt.tzinfo else dt.replace(tzinfo=estimate.api_timezone)
+
+    at = _time(args.at) if args.at else estimate.now()
+    for key, value in estimate.evaluate(at).items():
+        print(f'{key}: {value.isoformat() if isinstance(value, datetime) else value}')
+    for day in sorted({t.date() for t in estimate.wh_hours}):
+        print(f'day {day}: {estimate.day_production(day)} Wh')
+    for begin, end in args.range:
+        print(f'range {begin} - {end}: {estimate.energy_between(_time(begin), _time(end))} Wh')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
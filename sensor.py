@@ -4,10 +4,10 @@ from __future__ import annotations
 
 from collections.abc import Callable
 from dataclasses import dataclass
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Any
 
-from .pvnode import Estimate
+from .pvnode import Snapshot
 
 from homeassistant.components.sensor import (
     DOMAIN as SENSOR_DOMAIN,
@@ -21,10 +21,11 @@ from homeassistant.const import (
     UnitOfPower,
     UnitOfSpeed,
     UnitOfTemperature,
+    UnitOfTime,
     UnitOfVolumetricFlux,
     PERCENTAGE,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddConfigEntryEntitiesCallback
 from homeassistant.helpers.typing import StateType
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
@@ -32,6 +33,7 @@ from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from . import PVNodeConfigEntry
 from .const import (
     CONDITION_MAP,
+    CONF_FLEET,
     CONF_WEATHER_ENABLED
 )
 from .coordinator import PVNodeDataUpdateCoordinator
@@ -41,14 +43,15 @@ from .coordinator import PVNodeDataUpdateCoordinator
 class PVNodeSensorEntityDescription(SensorEntityDescription):
     """Describes a PVNode Sensor."""
 
-    state: Callable[[Estimate], Any] | None = None
+    state: Callable[[Snapshot], Any] | None = None
+    attributes: Callable[[PVNodeDataUpdateCoordinator], dict[str, Any] | None] | None = None
+    currency: bool = False
 
 
 ENERGY_SENSORS: tuple[PVNodeSensorEntityDescription, ...] = (
     PVNodeSensorEntityDescription(
         key="energy_production_today",
         translation_key="energy_production_today",
-        state=lambda estimate, coordinator: estimate.energy_production_today,
         device_class=SensorDeviceClass.ENERGY,
         native_unit_of_measurement=UnitOfEnergy.WATT_HOUR,
         suggested_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
@@ -57,16 +60,32 @@ ENERGY_SENSORS: tuple[PVNodeSensorEntityDescription, ...] = (
     PVNodeSensorEntityDescription(
         key="energy_production_today_remaining",
         translation_key="energy_production_today_remaining",
-        state=lambda estimate, coordinator: estimate.energy_production_today_remaining,
         device_class=SensorDeviceClass.ENERGY,
         native_unit_of_measurement=UnitOfEnergy.WATT_HOUR,
         suggested_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         suggested_display_precision=1,
     ),
+    PVNodeSensorEntityDescription(
+        key="energy_production_today_p10",
+        translation_key="energy_production_today_p10",
+        device_class=SensorDeviceClass.ENERGY,
+        entity_registry_enabled_default=False,
+        native_unit_of_measurement=UnitOfEnergy.WATT_HOUR,
+        suggested_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        suggested_display_precision=1,
+    ),
+    PVNodeSensorEntityDescription(
+        key="energy_production_today_p90",
+        translation_key="energy_production_today_p90",
+        device_class=SensorDeviceClass.ENERGY,
+        entity_registry_enabled_default=False,
+        native_unit_of_measurement=UnitOfEnergy.WATT_HOUR,
+        suggested_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        suggested_display_precision=1,
+    ),
     PVNodeSensorEntityDescription(
         key="energy_production_tomorrow",
         translation_key="energy_production_tomorrow",
-        state=lambda estimate, coordinator: estimate.energy_production_tomorrow,
         device_class=SensorDeviceClass.ENERGY,
         native_unit_of_measurement=UnitOfEnergy.WATT_HOUR,
         suggested_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
@@ -86,7 +105,6 @@ ENERGY_SENSORS: tuple[PVNodeSensorEntityDescription, ...] = (
         key="power_production_now",
         translation_key="power_production_now",
         device_class=SensorDeviceClass.POWER,
-        state=lambda estimate, coordinator: estimate.power_production_now,
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement=UnitOfPower.WATT,
         suggested_display_precision=0
@@ -94,9 +112,6 @@ ENERGY_SENSORS: tuple[PVNodeSensorEntityDescription, ...] = (
     PVNodeSensorEntityDescription(
         key="power_production_next_hour",
         translation_key="power_production_next_hour",
-        state=lambda estimate, coordinator: estimate.power_production_at_time(
-            estimate.now() + timedelta(hours=1)
-        ),
         device_class=SensorDeviceClass.POWER,
         entity_registry_enabled_default=False,
         native_unit_of_measurement=UnitOfPower.WATT,
@@ -105,9 +120,6 @@ ENERGY_SENSORS: tuple[PVNodeSensorEntityDescription, ...] = (
     PVNodeSensorEntityDescription(
         key="power_production_next_12hours",
         translation_key="power_production_next_12hours",
-        state=lambda estimate, coordinator: estimate.power_production_at_time(
-            estimate.now() + timedelta(hours=12)
-        ),
         device_class=SensorDeviceClass.POWER,
         entity_registry_enabled_default=False,
         native_unit_of_measurement=UnitOfPower.WATT,
@@ -116,9 +128,6 @@ ENERGY_SENSORS: tuple[PVNodeSensorEntityDescription, ...] = (
     PVNodeSensorEntityDescription(
         key="power_production_next_24hours",
         translation_key="power_production_next_24hours",
-        state=lambda estimate, coordinator: estimate.power_production_at_time(
-            estimate.now() + timedelta(hours=24)
-        ),
         device_class=SensorDeviceClass.POWER,
         entity_registry_enabled_default=False,
         native_unit_of_measurement=UnitOfPower.WATT,
@@ -127,7 +136,6 @@ ENERGY_SENSORS: tuple[PVNodeSensorEntityDescription, ...] = (
     PVNodeSensorEntityDescription(
         key="energy_current_hour",
         translation_key="energy_current_hour",
-        state=lambda estimate, coordinator: estimate.energy_current_hour,
         device_class=SensorDeviceClass.ENERGY,
         native_unit_of_measurement=UnitOfEnergy.WATT_HOUR,
         suggested_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
@@ -136,7 +144,6 @@ ENERGY_SENSORS: tuple[PVNodeSensorEntityDescription, ...] = (
     PVNodeSensorEntityDescription(
         key="energy_next_hour",
         translation_key="energy_next_hour",
-        state=lambda estimate, coordinator: estimate.sum_energy_production(1),
         device_class=SensorDeviceClass.ENERGY,
         native_unit_of_measurement=UnitOfEnergy.WATT_HOUR,
         suggested_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
@@ -168,7 +175,7 @@ WEATHER_SENSORS: tuple[PVNodeSensorEntityDescription, ...] = (
     PVNodeSensorEntityDescription(
         key='weather_code_now',
         name="Weather Code",
-        state= lambda estimate, coordinator: coordinator.format_condition(estimate.weather_code_now),
+        state=lambda snapshot: snapshot.get("weather_condition_now"),
     ),
     PVNodeSensorEntityDescription(
         key='weather_wind_speed_now',
@@ -187,13 +194,180 @@ WEATHER_SENSORS: tuple[PVNodeSensorEntityDescription, ...] = (
 )
 
 
+BATTERY_SENSORS: tuple[PVNodeSensorEntityDescription, ...] = (
+    PVNodeSensorEntityDescription(
+        key="battery_soc_end_of_day",
+        translation_key="battery_soc_end_of_day",
+        attributes=lambda coordinator: {
+            "forecast": {
+                timestamp.isoformat(): round(soc, 1)
+                for timestamp, soc in coordinator.battery_projection.soc.items()
+            }
+        } if coordinator.battery_projection else None,
+        device_class=SensorDeviceClass.BATTERY,
+        native_unit_of_measurement=PERCENTAGE,
+        suggested_display_precision=0,
+    ),
+    PVNodeSensorEntityDescription(
+        key="battery_time_to_full",
+        translation_key="battery_time_to_full",
+        device_class=SensorDeviceClass.TIMESTAMP,
+    ),
+    PVNodeSensorEntityDescription(
+        key="battery_time_to_empty",
+        translation_key="battery_time_to_empty",
+        device_class=SensorDeviceClass.TIMESTAMP,
+    ),
+    PVNodeSensorEntityDescription(
+        key="battery_grid_export_today",
+        translation_key="battery_grid_export_today",
+        device_class=SensorDeviceClass.ENERGY,
+        native_unit_of_measurement=UnitOfEnergy.WATT_HOUR,
+        suggested_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        suggested_display_precision=1,
+    ),
+)
+
+
+EXPORT_SENSORS: tuple[PVNodeSensorEntityDescription, ...] = (
+    PVNodeSensorEntityDescription(
+        key="export_energy_today",
+        translation_key="export_energy_today",
+        device_class=SensorDeviceClass.ENERGY,
+        native_unit_of_measurement=UnitOfEnergy.WATT_HOUR,
+        suggested_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        suggested_display_precision=1,
+    ),
+    PVNodeSensorEntityDescription(
+        key="curtailed_energy_today",
+        translation_key="curtailed_energy_today",
+        device_class=SensorDeviceClass.ENERGY,
+        native_unit_of_measurement=UnitOfEnergy.WATT_HOUR,
+        suggested_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        suggested_display_precision=1,
+    ),
+    PVNodeSensorEntityDescription(
+        key="curtailed_energy_tomorrow",
+        translation_key="curtailed_energy_tomorrow",
+        device_class=SensorDeviceClass.ENERGY,
+        native_unit_of_measurement=UnitOfEnergy.WATT_HOUR,
+        suggested_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        suggested_display_precision=1,
+    ),
+    PVNodeSensorEntityDescription(
+        key="hours_above_export_limit_today",
+        translation_key="hours_above_export_limit_today",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.HOURS,
+        suggested_display_precision=2,
+    ),
+)
+
+
+TARIFF_SENSORS: tuple[PVNodeSensorEntityDescription, ...] = (
+    PVNodeSensorEntityDescription(
+        key="production_value_remaining_today",
+        translation_key="production_value_remaining_today",
+        device_class=SensorDeviceClass.MONETARY,
+        currency=True,
+        suggested_display_precision=2,
+    ),
+    PVNodeSensorEntityDescription(
+        key="production_value_tomorrow",
+        translation_key="production_value_tomorrow",
+        device_class=SensorDeviceClass.MONETARY,
+        currency=True,
+        suggested_display_precision=2,
+    ),
+    PVNodeSensorEntityDescription(
+        key="cheapest_window_start",
+        translation_key="cheapest_window_start",
+        device_class=SensorDeviceClass.TIMESTAMP,
+    ),
+    PVNodeSensorEntityDescription(
+        key="most_valuable_window_start",
+        translation_key="most_valuable_window_start",
+        device_class=SensorDeviceClass.TIMESTAMP,
+    ),
+    PVNodeSensorEntityDescription(
+        key="grid_charge_hours",
+        translation_key="grid_charge_hours",
+        attributes=lambda coordinator: {
+            "hours": [hour.isoformat() for hour in coordinator.tariff_plan.charge_hours]
+        } if coordinator.tariff_plan else None,
+        native_unit_of_measurement=UnitOfTime.HOURS,
+    ),
+)
+
+
+FLEET_SENSORS: tuple[PVNodeSensorEntityDescription, ...] = (
+    PVNodeSensorEntityDescription(
+        key="fleet_energy_production_today",
+        translation_key="fleet_energy_production_today",
+        device_class=SensorDeviceClass.ENERGY,
+        native_unit_of_measurement=UnitOfEnergy.WATT_HOUR,
+        suggested_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        suggested_display_precision=1,
+    ),
+    PVNodeSensorEntityDescription(
+        key="fleet_energy_production_today_remaining",
+        translation_key="fleet_energy_production_today_remaining",
+        device_class=SensorDeviceClass.ENERGY,
+        native_unit_of_measurement=UnitOfEnergy.WATT_HOUR,
+        suggested_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        suggested_display_precision=1,
+    ),
+    PVNodeSensorEntityDescription(
+        key="fleet_energy_production_tomorrow",
+        translation_key="fleet_energy_production_tomorrow",
+        device_class=SensorDeviceClass.ENERGY,
+        native_unit_of_measurement=UnitOfEnergy.WATT_HOUR,
+        suggested_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        suggested_display_precision=1,
+    ),
+    PVNodeSensorEntityDescription(
+        key="fleet_power_production_now",
+        translation_key="fleet_power_production_now",
+        device_class=SensorDeviceClass.POWER,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfPower.WATT,
+        suggested_display_precision=0
+    ),
+    PVNodeSensorEntityDescription(
+        key="fleet_energy_current_hour",
+        translation_key="fleet_energy_current_hour",
+        device_class=SensorDeviceClass.ENERGY,
+        native_unit_of_measurement=UnitOfEnergy.WATT_HOUR,
+        suggested_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        suggested_display_precision=1,
+    ),
+    PVNodeSensorEntityDescription(
+        key="fleet_energy_next_hour",
+        translation_key="fleet_energy_next_hour",
+        device_class=SensorDeviceClass.ENERGY,
+        native_unit_of_measurement=UnitOfEnergy.WATT_HOUR,
+        suggested_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        suggested_display_precision=1,
+    ),
+)
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: PVNodeConfigEntry, async_add_entities: AddConfigEntryEntitiesCallback,) -> None:
     """Defer sensor setup to the shared sensor module."""
     coordinator = entry.runtime_data
 
-    sensors = ENERGY_SENSORS
-    if entry.data[CONF_WEATHER_ENABLED]:
-        sensors = ENERGY_SENSORS + WEATHER_SENSORS
+    if entry.data.get(CONF_FLEET):
+        sensors = FLEET_SENSORS
+    else:
+        sensors = ENERGY_SENSORS
+        if entry.data[CONF_WEATHER_ENABLED]:
+            sensors = ENERGY_SENSORS + WEATHER_SENSORS
+        if coordinator.battery is not None:
+            sensors = sensors + BATTERY_SENSORS
+        if coordinator.export_limit is not None:
+            sensors = sensors + EXPORT_SENSORS
+        if coordinator.price_entity is not None:
+            sensors = sensors + TARIFF_SENSORS
 
     async_add_entities(
         PVNodeSensorEntity(
@@ -210,6 +384,7 @@ class PVNodeSensorEntity(CoordinatorEntity[PVNodeDataUpdateCoordinator], SensorE
 
     entity_description: PVNodeSensorEntityDescription
     _attr_has_entity_name = True
+    _unrecorded_attributes = frozenset({"forecast"})
 
     def __init__(self, *, entry_id: str, coordinator: PVNodeDataUpdateCoordinator, entity_description: PVNodeSensorEntityDescription,) -> None:
         """Initialize PVNode sensor."""
@@ -219,14 +394,36 @@ class PVNodeSensorEntity(CoordinatorEntity[PVNodeDataUpdateCoordinator], SensorE
         self._attr_unique_id = f"{entry_id}_{entity_description.key}"
         self._attr_device_info = coordinator.get_device_info()
 
+        self._written: tuple | None = None
+
     @property
     def native_value(self) -> datetime | StateType:
         """Return the state of the sensor."""
+        if (snapshot := self.coordinator.snapshot) is None:
+            return None
         if self.entity_description.state is None:
-            state: StateType | datetime = getattr(
-                self.coordinator.data, self.entity_description.key
-            )
-        else:
-            state = self.entity_description.state(self.coordinator.data, self.coordinator)
+            return snapshot.get(self.entity_description.key)
+        return self.entity_description.state(snapshot)
+
+    @property
+    def native_unit_of_measurement(self) -> str | None:
+        """Return the unit, currency sensors follow the price entity."""
+        if self.entity_description.currency:
+            return self.coordinator.price_currency or self.coordinator.hass.config.currency
+        return super().native_unit_of_measurement
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return the state attributes of the sensor."""
+        if self.entity_description.attributes is None:
+            return None
+        return self.entity_description.attributes(self.coordinator)
 
-        return state
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only if something changed since the last write."""
+        written = (self.available, self.native_value, self.extra_state_attributes)
+        if written == self._written:
+            return
+        self._written = written
+        self.async_write_ha_state()
@@ -0,0 +1,162 @@
+"""Dynamic tariff planning over the PVNode forecast."""
+
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, tzinfo
+from itertools import accumulate
+from math import isfinite
+from typing import Any
+
+# attribute layouts of common price integrations (Nord Pool, Tibber, EPEX Spot, ...)
+PRICE_LISTS = ('raw_today', 'raw_tomorrow', 'prices', 'prices_today', 'prices_tomorrow', 'forecast', 'data')
+PRICE_STARTS = ('start', 'start_time', 'startsAt', 'time', 'hour')
+PRICE_VALUES = ('value', 'price', 'total', 'price_per_kwh', 'marketprice')
+
+# price units: energy unit to the factor to a price per kWh, minor currency units
+ENERGY_UNITS = {'wh': 1000.0, 'kwh': 1.0, 'mwh': 0.001}
+MINOR_CURRENCIES = ('ct', 'c', 'cent', 'cents', 'öre', 'øre', 'p', 'pence', 'rp')
+CURRENCY_SYMBOLS = {'€': 'EUR', '$': 'USD', '£': 'GBP'}
+
+# how far ahead a charged battery can be used
+CHARGE_LOOKAHEAD = 24
+
+
+def price_unit(unit: str | None) -> tuple[str | None, float]:
+    """Return the currency of a price unit and the factor to a price per kWh in it.
+
+    Minor currency units like ct/kWh are converted to the major unit and have
+    no currency of their own (None), nor do units that cannot be parsed.
+    """
+    if not unit or '/' not in unit:
+        return None, 1.0
+    currency, _, energy = unit.partition('/')
+    currency = currency.strip()
+    factor = ENERGY_UNITS.get(energy.strip().lower(), 1.0)
+    if currency.lower() in MINOR_CURRENCIES:
+        return None, factor / 100
+    return CURRENCY_SYMBOLS.get(currency, currency) or None, factor
+
+
+def parse_prices(items: Iterable[Mapping[str, Any]], tz: tzinfo) -> dict[datetime, float]:
+    """Return hourly prices, sub-hourly prices are averaged.
+
+    Items without a parseable start time or price are skipped, the series
+    comes from third party entities.
+    """
+    buckets: dict[datetime, list[float]] = {}
+    for item in items:
+        start = next((item[key] for key in PRICE_STARTS if key in item), None)
+        value = next((item[key] for key in PRICE_VALUES if key in item), None)
+        try:
+            if isinstance(start, str):
+                start = datetime.fromisoformat(start)
+            value = float(value)
+        except (TypeError, ValueError):
+            continue
+        if not isinstance(start, datetime) or not isfinite(value):
+            continue
+        if start.tzinfo is None:
+            start = start.replace(tzinfo=tz)
+        hour = start.astimezone(tz).replace(minute=0, second=0, microsecond=0)
+        buckets.setdefault(hour, []).append(value)
+
+    return {hour: sum(values) / len(values) for hour, values in sorted(buckets.items())}
+
+
+def prices_from_attributes(attributes: Mapping[str, Any], tz: tzinfo) -> dict[datetime, float]:
+    """Collect the price series of a price entity from its attributes."""
+    items = []
+    for key in PRICE_LISTS:
+        if isinstance(value := attributes.get(key), list):
+            items.extend(item for item in value if isinstance(item, Mapping))
+    return parse_prices(items, tz)
+
+
+@dataclass(frozen=True)
+class TariffPlan:
+    """Prices aligned on the forecast hours and what to make of them."""
+
+    hours: list[datetime]
+    prices: list[float]
+    values: list[float]
+    cheapest_window: datetime | None
+    most_valuable_window: datetime | None
+    charge_hours: list[datetime]
+
+    def production_value(self, specific_date: date) -> float:
+        """Return the value of the forecast production of a day."""
+        return sum(v for hour, v in zip(self.hours, self.values) if hour.date() == specific_date)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            'hours': [
+                {'start': hour.isoformat(), 'price': price, 'production_value': value}
+                for hour, price, value in zip(self.hours, self.prices, self.values)
+            ],
+            'cheapest_window': self.cheapest_window and self.cheapest_window.isoformat(),
+            'most_valuable_window': self.most_valuable_window and self.most_valuable_window.isoformat(),
+            'charge_hours': [hour.isoformat() for hour in self.charge_hours],
+        }
+
+
+def _best_window(hours: list[datetime], prefix: list[float], window: int, better) -> datetime | None:
+    """Return the start of the best run of window consecutive hours."""
+    best = best_sum = None
+    for i in range(len(hours) - window + 1):
+        if hours[i + window - 1] - hours[i] != timedelta(hours=window - 1):
+            continue
+        total = round(prefix[i + window] - prefix[i], 9)
+        if best_sum is None or better(total, best_sum):
+            best, best_sum = hours[i], total
+    return best
+
+
+def _max_ahead(values: list[float], lookahead: int) -> list[float | None]:
+    """Return for every position the maximum of the following lookahead values."""
+    result: list[float | None] = [None] * len(values)
+    window: deque[int] = deque()
+    for i in range(len(values) - 1, -1, -1):
+        if window and window[0] > i + lookahead:
+            window.popleft()
+        result[i] = values[window[0]] if window else None
+        while window and values[window[-1]] <= values[i]:
+            window.pop()
+        window.append(i)
+    return result
+
+
+def plan_tariff(wh_hours: Mapping[datetime, float], prices: Mapping[datetime, float], load: list[float], now: datetime, window: int, charge_hours: int = 0, efficiency: float = 1.0) -> TariffPlan:
+    """Align prices (per kWh) with the forecast hours from the current hour on.
+
+    The cheapest window is the cheapest run of window hours to draw from the
+    grid, the most valuable window the run where the forecast production is
+    worth the most. Grid charging is recommended in the cheapest hours without
+    PV surplus whose price, after losses, is below the highest price to come.
+    """
+    current = now.replace(minute=0, second=0, microsecond=0)
+    hours = [hour for hour in wh_hours if hour >= current and hour in prices]
+    price_list = [prices[hour] for hour in hours]
+    values = [wh_hours[hour] / 1000 * prices[hour] for hour in hours]
+
+    cheapest = _best_window(hours, list(accumulate(price_list, initial=0)), window, lambda a, b: a < b)
+    most_valuable = _best_window(hours, list(accumulate(values, initial=0)), window, lambda a, b: a > b)
+
+    candidates = [
+        i for i, peak in enumerate(_max_ahead(price_list, CHARGE_LOOKAHEAD))
+        if peak is not None
+        and wh_hours[hours[i]] <= load[hours[i].hour]
+        and price_list[i] / efficiency < peak
+    ]
+    candidates = sorted(candidates, key=price_list.__getitem__)[:charge_hours]
+
+    return TariffPlan(
+        hours,
+        price_list,
+        values,
+        cheapest,
+        most_valuable,
+        [hours[i] for i in sorted(candidates)],
+    )
@@ -0,0 +1,14 @@
+"""Make the Home Assistant independent modules importable as ``ha_pvnode``.
+
+The repository root is the integration package, its ``__init__`` needs
+Home Assistant. Registering the package without running it lets the tests
+import pvnode, battery, feedin and tariff, relative imports included.
+"""
+
+import sys
+import types
+from pathlib import Path
+
+_package = types.ModuleType("ha_pvnode")
+_package.__path__ = [str(Path(__file__).parent.parent)]
+sys.modules.setdefault("ha_pvnode", _package)
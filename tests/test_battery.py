@@ -0,0 +1,55 @@
+"""Tests for the battery state-of-charge projection."""
+
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from ha_pvnode.battery import Battery, project_battery
+
+START = datetime(2025, 6, 1, tzinfo=ZoneInfo("Europe/Berlin"))
+BATTERY = Battery(capacity=10000, charge_power=5000, discharge_power=5000, efficiency=1.0)
+
+
+def _hours(values) -> dict[datetime, float]:
+    return {START + timedelta(hours=h): v for h, v in enumerate(values)}
+
+
+def test_time_to_full_within_the_hour() -> None:
+    """2 kWh left at 4 kW surplus is full after half an hour."""
+    pv = _hours([0] * 8 + [4000] * 4 + [0] * 12)
+    projection = project_battery(BATTERY, 80, START + timedelta(hours=8), pv, [0.0] * 24)
+
+    assert projection.time_to_full == START + timedelta(hours=8, minutes=30)
+    assert projection.soc_at(START + timedelta(hours=9)) == pytest.approx(100)
+    # the surplus the battery could not take goes to the grid
+    assert projection.grid_export[START + timedelta(hours=8)] == pytest.approx(2000)
+    assert projection.export_until(START + timedelta(hours=12)) == pytest.approx(14000)
+
+
+def test_time_to_empty_within_the_hour() -> None:
+    """1 kWh left at 4 kW load is empty after a quarter of an hour."""
+    pv = _hours([0] * 24)
+    projection = project_battery(BATTERY, 10, START + timedelta(hours=20), pv, [4000.0] * 24)
+
+    assert projection.time_to_empty == START + timedelta(hours=20, minutes=15)
+    assert projection.soc_at(START + timedelta(hours=21)) == 0
+    assert projection.grid_import[START + timedelta(hours=20)] == pytest.approx(3000)
+
+
+def test_partial_current_hour_and_power_limits() -> None:
+    battery = Battery(capacity=10000, charge_power=2000, discharge_power=2000, efficiency=0.81)
+    pv = _hours([0] * 12 + [6000] * 12)
+    projection = project_battery(battery, 0, START + timedelta(hours=12, minutes=30), pv, [1000.0] * 24)
+
+    # half an hour left, capped at half the charge power
+    assert projection.soc_at(START + timedelta(hours=13)) == pytest.approx(10)
+    assert projection.time_to_empty == START + timedelta(hours=12, minutes=30)
+    # then 2 kWh per hour: full after 4.5 more hours
+    assert projection.time_to_full == START + timedelta(hours=17, minutes=30)
+
+
+def test_soc_is_clamped() -> None:
+    projection = project_battery(BATTERY, 120, START, _hours([0] * 2), [0.0] * 24)
+    assert projection.time_to_full == START
+    assert projection.soc_at(START + timedelta(hours=1)) == 100
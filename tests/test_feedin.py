@@ -0,0 +1,36 @@
+"""Tests for the grid feed-in limit simulation."""
+
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from ha_pvnode.feedin import project_export
+from ha_pvnode.pvnode import Estimate
+
+
+def _estimate(quarters: dict[int, float]) -> Estimate:
+    """A 10 kWp estimate of 2025-06-01, watts per kWp by quarter hour, 0 elsewhere."""
+    start = datetime(2025, 6, 1)
+    rows = [
+        {"dtm": (start + timedelta(minutes=15 * (i + 1))).isoformat(), "spec_watts": quarters.get(i, 0)}
+        for i in range(96)
+    ]
+    return Estimate(10.0, {"data_timezone": "Europe/Berlin", "values": rows})
+
+
+def test_project_export() -> None:
+    # 12:00 all above the limit, 13:00 half of it
+    estimate = _estimate({48: 800, 49: 800, 50: 800, 51: 800, 52: 800, 53: 800, 54: 400, 55: 400})
+    forecast = project_export(estimate, 6000, [500.0] * 24)
+
+    export, curtailed, limited = forecast.day(estimate, date(2025, 6, 1))
+    assert export == pytest.approx(6000 + (6000 * 2 + 3500 * 2) / 4)
+    assert curtailed == pytest.approx(1500 + 1500 * 2 / 4)
+    assert limited == pytest.approx(1.5)
+    assert forecast.day(estimate, date(2025, 6, 2)) == (0, 0, 0)
+
+
+def test_project_export_below_load() -> None:
+    estimate = _estimate({48: 20, 49: 20})
+    forecast = project_export(estimate, 6000, [500.0] * 24)
+    assert forecast.day(estimate, date(2025, 6, 1)) == (0, 0, 0)
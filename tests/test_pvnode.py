@@ -0,0 +1,164 @@
+"""Tests for the Home Assistant independent PVNode client."""
+
+import json
+import random
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from ha_pvnode import pvnode
+
+
+def _response() -> bytes:
+    values = [
+        {
+            "dtm": f"2025-06-01T{i // 4:02d}:{i % 4 * 15:02d}:00",
+            "spec_watts": round(max(0.0, 1 - abs(i - 52) / 30) * 0.8123456789, 9),
+            "temp": -3.5 + i * 0.25,
+            "RH": 1e2,
+            "weather_code": i % 4,
+        }
+        for i in range(96)
+    ]
+    document = {
+        "data_timezone": "Europe/Berlin",
+        "note": "Zürich \"quoted\" \\ ☀",
+        "values": values,
+        "units": {"spec_watts": "W/Wp", "nested": [1, [2, {"a": None}], True, False]},
+    }
+    return json.dumps(document, ensure_ascii=False, indent=1).encode()
+
+
+def _parse(chunks) -> dict:
+    parsed = {"values": []}
+    for key, value in pvnode._stream_json(chunks):
+        if key == "values":
+            parsed["values"].append(value)
+        else:
+            parsed[key] = value
+    return parsed
+
+
+def _split(data: bytes, rng: random.Random) -> list[bytes]:
+    if len(data) < 2:
+        return [data]
+    cuts = sorted(rng.sample(range(1, len(data)), rng.randint(1, min(200, len(data) - 1))))
+    return [data[a:b] for a, b in zip([0, *cuts], [*cuts, len(data)])]
+
+
+def test_stream_json_random_chunks() -> None:
+    """Any chunking of a response parses like json.loads."""
+    data = _response()
+    expected = json.loads(data)
+    rng = random.Random(20251019)
+
+    for _ in range(200):
+        assert _parse(_split(data, rng)) == expected
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 16384])
+def test_stream_json_fixed_chunks(size: int) -> None:
+    """Fixed chunk sizes, one byte splits every multi-byte character."""
+    data = _response()
+    chunks = [data[i:i + size] for i in range(0, len(data), size)]
+    assert _parse(chunks) == json.loads(data)
+
+
+def test_stream_json_truncated() -> None:
+    """A response cut short raises instead of yielding a partial forecast."""
+    data = _response()
+    rng = random.Random(1)
+
+    for end in rng.sample(range(1, len(data) - 1), 50):
+        with pytest.raises(ValueError):
+            _parse(_split(data[:end], rng))
+
+
+def _estimate(day: str, watts) -> "pvnode.Estimate":
+    """An estimate of one day at 1 kWp, watts for each hour, in quarter-hour rows."""
+    start = datetime.fromisoformat(day)
+    rows = [
+        {"dtm": (start + timedelta(minutes=15 * (i + 1))).isoformat(), "spec_watts": watts[i // 4]}
+        for i in range(96)
+    ]
+    return pvnode.Estimate(1.0, {"data_timezone": "Europe/Berlin", "values": rows})
+
+
+def test_diff_estimates_only_compares_shared_hours() -> None:
+    """A new day's first forecast is not a change against yesterday's."""
+    watts = [0] * 6 + [500] * 12 + [0] * 6
+    yesterday = _estimate("2025-05-31", watts)
+    today = _estimate("2025-06-01", watts)
+    at = datetime(2025, 6, 1, 7, tzinfo=ZoneInfo("Europe/Berlin"))
+
+    diff = pvnode.diff_estimates(yesterday, today, at)
+    assert diff["today_remaining_delta"] == 0
+    assert diff["total_hour_delta"] == 0
+    assert not yesterday.covers(at.date())
+
+
+def test_diff_estimates_deltas() -> None:
+    watts = [0] * 6 + [500] * 12 + [0] * 6
+    higher = watts[:12] + [600] * 6 + watts[18:]
+    at = datetime(2025, 6, 1, 7, tzinfo=ZoneInfo("Europe/Berlin"))
+
+    diff = pvnode.diff_estimates(_estimate("2025-06-01", watts), _estimate("2025-06-01", higher), at)
+    assert diff["today_remaining_delta"] == pytest.approx(6 * 100)
+    assert diff["max_hour_delta"] == pytest.approx(100)
+    assert diff["tomorrow_delta"] == 0
+
+
+def _client(estimate: "pvnode.Estimate") -> "pvnode.PVNode":
+    client = pvnode.PVNode("key", 48.1, 11.6, 30, 180, 1.0, 0, None, "Europe/Berlin", "", "", weather_enabled=True)
+    client.estimate_cached = estimate
+    return client
+
+
+def test_due_groups_schedules() -> None:
+    """PV waits for the production window, weather runs on its own clock."""
+    tz = ZoneInfo("Europe/Berlin")
+    estimate = _estimate("2025-06-01", [0] * 6 + [500] * 12 + [0] * 6)
+    estimate.fetched = {"pv": datetime(2025, 6, 1, 18, tzinfo=tz), "weather": datetime(2025, 6, 1, 8, tzinfo=tz)}
+    client = _client(estimate)
+    sunrise = datetime(2025, 6, 2, 5, 15, tzinfo=tz)
+
+    # weather is stale in the evening, PV is outside its window
+    assert client.due_groups(datetime(2025, 6, 1, 23, tzinfo=tz), sunrise) == ["weather"]
+
+    # weather refetched at 23:00 is due again for the new day, PV waits for sunrise
+    estimate.fetched["weather"] = datetime(2025, 6, 1, 23, tzinfo=tz)
+    assert client.due_groups(datetime(2025, 6, 1, 23, 30, tzinfo=tz), sunrise) == []
+    assert client.due_groups(datetime(2025, 6, 2, 0, 30, tzinfo=tz), sunrise) == ["weather"]
+
+    estimate.fetched["weather"] = datetime(2025, 6, 2, 0, 30, tzinfo=tz)
+    for hour in (1, 2, 3):
+        assert client.due_groups(datetime(2025, 6, 2, hour, 30, tzinfo=tz), sunrise) == []
+    assert client.due_groups(datetime(2025, 6, 2, 4, 15, tzinfo=tz), sunrise) == ["pv"]
+
+
+def test_due_groups_production_window() -> None:
+    tz = ZoneInfo("Europe/Berlin")
+    estimate = _estimate("2025-06-01", [0] * 6 + [500] * 12 + [0] * 6)
+    estimate.fetched = {"pv": datetime(2025, 6, 1, 7, tzinfo=tz), "weather": datetime(2025, 6, 1, 7, tzinfo=tz)}
+    client = _client(estimate)
+
+    assert client.due_groups(datetime(2025, 6, 1, 9, tzinfo=tz)) == []
+    assert client.due_groups(datetime(2025, 6, 1, 10, tzinfo=tz)) == ["pv"]
+    assert client.due_groups(datetime(2025, 6, 1, 15, tzinfo=tz)) == ["pv", "weather"]
+    # after the last producing slot PV is left alone
+    estimate.fetched["weather"] = datetime(2025, 6, 1, 15, tzinfo=tz)
+    assert client.due_groups(datetime(2025, 6, 1, 20, tzinfo=tz)) == []
+
+
+def test_missing_weather_is_not_zero() -> None:
+    start = datetime(2025, 6, 1)
+    rows = [
+        {"dtm": (start + timedelta(minutes=15 * (i + 1))).isoformat(), "spec_watts": 0, "temp": 12.5}
+        for i in range(8)
+    ]
+    estimate = pvnode.Estimate(1.0, {"data_timezone": "Europe/Berlin", "values": rows})
+    tz = ZoneInfo("Europe/Berlin")
+
+    assert estimate.evaluate(datetime(2025, 6, 1, 1, tzinfo=tz))["weather_temperature_now"] == 12.5
+    assert estimate.evaluate(datetime(2025, 6, 1, 5, tzinfo=tz))["weather_temperature_now"] is None
@@ -0,0 +1,90 @@
+"""Tests for the dynamic tariff planner."""
+
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from ha_pvnode.tariff import _max_ahead, parse_prices, plan_tariff, price_unit, prices_from_attributes
+
+TZ = ZoneInfo("Europe/Berlin")
+START = datetime(2025, 6, 1, tzinfo=TZ)
+
+
+def _hours(values) -> dict[datetime, float]:
+    return {START + timedelta(hours=h): v for h, v in enumerate(values)}
+
+
+def test_parse_prices_averages_quarter_hours() -> None:
+    items = [
+        {"start": (START + timedelta(minutes=15 * i)).isoformat(), "value": value}
+        for i, value in enumerate([0.1, 0.2, 0.3, 0.4, 1.0])
+    ]
+    assert parse_prices(items, TZ) == {START: pytest.approx(0.25), START + timedelta(hours=1): 1.0}
+
+
+def test_parse_prices_skips_broken_items() -> None:
+    """Third party attributes must not break the planner."""
+    items = [
+        {"hour": 5, "price": 1},
+        {"start": "tomorrow", "price": 1},
+        {"start": "2025-06-01T10:00", "price": "n/a"},
+        {"start": "2025-06-01T10:00", "price": None},
+        {"start": "2025-06-01T10:00", "price": float("nan")},
+        {"price": 1},
+        {"startsAt": "2025-06-01T11:00:00+02:00", "total": "0.3"},
+    ]
+    assert parse_prices(items, TZ) == {START.replace(hour=11): 0.3}
+
+
+def test_prices_from_attributes() -> None:
+    attributes = {
+        "raw_today": [{"start": START, "value": 0.2}, "junk"],
+        "raw_tomorrow": [{"start": START + timedelta(days=1), "value": 0.3}],
+        "unit_of_measurement": "EUR/kWh",
+    }
+    assert prices_from_attributes(attributes, TZ) == {START: 0.2, START + timedelta(days=1): 0.3}
+
+
+@pytest.mark.parametrize(
+    ("unit", "expected"),
+    [
+        ("EUR/kWh", ("EUR", 1.0)),
+        ("ct/kWh", (None, 0.01)),
+        ("€/MWh", ("EUR", 0.001)),
+        ("öre/kWh", (None, 0.01)),
+        (None, (None, 1.0)),
+    ],
+)
+def test_price_unit(unit, expected) -> None:
+    assert price_unit(unit) == expected
+
+
+def test_max_ahead_matches_brute_force() -> None:
+    values = [3, 1, 4, 1, 5, 9, 2, 6, 5, 3, 5]
+    for lookahead in (1, 3, 20):
+        expected = [max(values[i + 1:i + 1 + lookahead], default=None) for i in range(len(values))]
+        assert _max_ahead(values, lookahead) == expected
+
+
+def test_plan_tariff() -> None:
+    # production 08:00-16:00, cheap night and noon, expensive evening
+    wh = _hours([0] * 8 + [1000] * 9 + [0] * 7)
+    prices = _hours([0.10] * 6 + [0.30] * 3 + [0.05] * 5 + [0.30] * 4 + [0.50] * 3 + [0.20] * 3)
+    plan = plan_tariff(wh, prices, [300.0] * 24, START + timedelta(hours=1, minutes=20), 3, 2, 0.9)
+
+    assert plan.hours[0] == START + timedelta(hours=1)
+    assert plan.cheapest_window == START + timedelta(hours=9)
+    assert plan.most_valuable_window == START + timedelta(hours=14)
+    # cheap hours without surplus, well below the evening peak after losses
+    assert plan.charge_hours == [START + timedelta(hours=1), START + timedelta(hours=2)]
+    assert plan.production_value(START.date()) == pytest.approx(0.30 + 0.05 * 5 + 0.30 * 3)
+
+
+def test_plan_tariff_skips_gaps_in_windows() -> None:
+    wh = _hours([0] * 6)
+    prices = _hours([0.1, 0.1, 0.5, 0.5, 0.5, 0.5])
+    del prices[START + timedelta(hours=1)]
+    plan = plan_tariff(wh, prices, [0.0] * 24, START, 2)
+    assert plan.cheapest_window == START + timedelta(hours=2)
+    assert plan.charge_hours == []
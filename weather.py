@@ -5,12 +5,6 @@ from __future__ import annotations
 from typing import cast
 
 from homeassistant.components.weather import (
-    ATTR_FORECAST_CONDITION,
-    ATTR_FORECAST_HUMIDITY,
-    ATTR_FORECAST_NATIVE_PRECIPITATION,
-    ATTR_FORECAST_NATIVE_TEMP,
-    ATTR_FORECAST_NATIVE_WIND_SPEED,
-    ATTR_FORECAST_TIME,
     SingleCoordinatorWeatherEntity,
     Forecast,
     WeatherEntityFeature,
@@ -25,7 +19,6 @@ from homeassistant.helpers.entity_platform import AddConfigEntryEntitiesCallback
 
 from .const import (
     ATTRIBUTION,
-    CONDITION_MAP, 
     CONF_WEATHER_ENABLED
 )
 
@@ -56,7 +49,11 @@ class PVNodeWeatherEntity(SingleCoordinatorWeatherEntity[PVNodeDataUpdateCoordin
     _attr_native_temperature_unit = UnitOfTemperature.CELSIUS
     _attr_native_wind_speed_unit = UnitOfSpeed.METERS_PER_SECOND
 
-    _attr_supported_features = WeatherEntityFeature.FORECAST_HOURLY
+    _attr_supported_features = (
+        WeatherEntityFeature.FORECAST_HOURLY
+        | WeatherEntityFeature.FORECAST_DAILY
+        | WeatherEntityFeature.FORECAST_TWICE_DAILY
+    )
 
     def __init__(self, coordinator: PVNodeDataUpdateCoordinator, entry: PVNodeConfigEntry) -> None:
         """Initialize."""
@@ -70,34 +67,34 @@ class PVNodeWeatherEntity(SingleCoordinatorWeatherEntity[PVNodeDataUpdateCoordin
     @property
     def condition(self) -> str | None:
         """Return the current condition."""
-        return CONDITION_MAP.get(self.coordinator.data.weather_code_now)
+        return self.coordinator.snapshot.get("weather_condition_now")
 
     @property
     def native_temperature(self) -> float:
         """Return the temperature."""
-        return cast(float, self.coordinator.data.weather_temperature_now)
+        return cast(float, self.coordinator.snapshot.get("weather_temperature_now"))
 
     @property
     def humidity(self) -> int:
         """Return the humidity."""
-        return cast(int, self.coordinator.data.weather_humidity_now)
+        return cast(int, self.coordinator.snapshot.get("weather_humidity_now"))
 
     @property
     def native_wind_speed(self) -> float:
         """Return the wind speed."""
-        return cast(float, self.coordinator.data.weather_wind_speed_now)
+        return cast(float, self.coordinator.snapshot.get("weather_wind_speed_now"))
 
     @callback
     def _async_forecast_hourly(self) -> list[Forecast] | None:
         """Return the hourly forecast in native units."""
-        return [
-            {
-                ATTR_FORECAST_TIME: date.isoformat(),
-                ATTR_FORECAST_HUMIDITY: item["RH"],
-                ATTR_FORECAST_NATIVE_TEMP: item["temp"],
-                ATTR_FORECAST_NATIVE_PRECIPITATION: item["precip"],
-                ATTR_FORECAST_NATIVE_WIND_SPEED: item["vwind"],
-                ATTR_FORECAST_CONDITION: self.coordinator.format_condition(item["weather_code"], date),
-            }
-            for date, item in self.coordinator.data.weather_hours.items()
-        ]
\ No newline at end of file
+        return self.coordinator.forecast_hourly()
+
+    @callback
+    def _async_forecast_daily(self) -> list[Forecast] | None:
+        """Return the daily forecast in native units."""
+        return self.coordinator.forecast_daily()
+
+    @callback
+    def _async_forecast_twice_daily(self) -> list[Forecast] | None:
+        """Return the twice daily forecast in native units."""
+        return self.coordinator.forecast_twice_daily()